@@ -0,0 +1,53 @@
+#!/usr/bin/python
+"""Check the time to import modelicares and that it doesn't load the plotting,
+GUI, or control packages.
+
+Run this from the base folder of the distribution::
+
+    python modelicares/00-import-time.py [budget]
+
+where *budget* is the maximum import time in seconds (default: 1.0).  Each
+import is timed in a new Python process and the fastest of several trials is
+used.  The exit status is 1 if the budget is exceeded or a heavy package is
+loaded.
+"""
+__author__ = "Kevin Davies"
+__email__ = "kdavies4@gmail.com"
+__copyright__ = "Copyright 2012-2013, Georgia Tech Research Corporation"
+__license__ = "BSD-compatible (see LICENSE.txt)"
+
+import os
+import sys
+import subprocess
+
+BUDGET = 1.0 # Default maximum import time in seconds
+N_TRIALS = 5
+HEAVY = ['wx', 'matplotlib.pyplot', 'control', 'modelicares.gui']
+# Packages that should only be loaded on first use
+
+CODE = ("import sys, time; start = time.time(); import modelicares; "
+        "print(repr((time.time() - start, "
+        "[name for name in %r if name in sys.modules])))" % HEAVY)
+
+
+def measure(n_trials=N_TRIALS):
+    """Return the fastest import time (in seconds) and the heavy packages that
+    were loaded.
+    """
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    times = []
+    for i in range(n_trials):
+        output = subprocess.check_output([sys.executable, '-c', CODE],
+                                         cwd=base_dir)
+        time, loaded = eval(output.strip().splitlines()[-1])
+        times.append(time)
+    return min(times), loaded
+
+
+if __name__ == '__main__':
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET
+    time, loaded = measure()
+    print("Import time: %.3f s (budget: %.3f s)" % (time, budget))
+    if loaded:
+        print("Heavy packages loaded on import: " + ", ".join(loaded))
+    sys.exit(0 if time <= budget and not loaded else 1)
@@ -6,14 +6,19 @@ from its submodules.  These are:
 
 - Basic supporting classes and functions (:mod:`~modelicares.base` module):
   :meth:`~base.add_arrows`, :meth:`~base.add_hlines`, :meth:`~base.add_vlines`,
-  :meth:`~base.animate`, :class:`~base.ArrowLine`, :meth:`~base.closeall`,
-  :meth:`~base.figure`, :meth:`~base.load_csv`, :meth:`~base.save`,
-  :meth:`~base.saveall`, and :meth:`~base.setup_subplots`
+  :meth:`~base.animate`, :meth:`~base.animate_figure`,
+  :class:`~base.ArrowLine`, :meth:`~base.closeall`, :meth:`~base.figure`,
+  :meth:`~base.load_csv`, :meth:`~base.save`, :meth:`~base.saveall`, and
+  :meth:`~base.setup_subplots`
 
 - To manage simulation experiments (:mod:`~modelicares.exps` module):
-  :class:`~exps.Experiment`, :mod:`~exps.doe`, :meth:`~exps.gen_experiments`,
-  :class:`~exps.ParamDict`, :meth:`~exps.read_params`, :meth:`~exps.run_models`,
-  :meth:`~exps.write_params`, and :meth:`~exps.write_script`
+  :class:`~exps.DsinFile`, :class:`~exps.DsinTemplate`,
+  :class:`~exps.Experiment`, :class:`~exps.ExperimentSet`, :mod:`~exps.doe`,
+  :meth:`~exps.gen_experiments`, :class:`~exps.Journal`,
+  :class:`~exps.ParamDict`, :class:`~exps.ParamRow`, :meth:`~exps.perf_report`,
+  :meth:`~exps.read_dslog`, :meth:`~exps.read_params`, :class:`~exps.RunCache`,
+  :meth:`~exps.run_models`, :meth:`~exps.write_params`, and
+  :meth:`~exps.write_script`
 
 - To handle multiple files at once (:mod:`~modelicares.multi` module):
   :meth:`~multi.multiload`, :meth:`~multi.multiplot`, :meth:`~multi.multibode`,
@@ -56,10 +61,13 @@ if not (major == 2 and minor1 == 7):
 #
 # These will be available directly from modelicares; others must be loaded from
 # their submodules.
-from base import (add_arrows, add_hlines, add_vlines, animate, ArrowLine,
-                 closeall, figure, load_csv, save, saveall, setup_subplots)
-from exps import (Experiment, gen_experiments, ParamDict, read_params,
-                  run_models, write_params, write_script)
+from base import (add_arrows, add_hlines, add_vlines, animate, animate_figure,
+                  ArrowLine, closeall, figure, load_csv, save, saveall,
+                  setup_subplots)
+from exps import (DsinFile, DsinTemplate, Experiment, ExperimentSet,
+                  gen_experiments, Journal, ParamDict, ParamRow, perf_report,
+                  read_dslog, read_params, RunCache, run_models, write_params,
+                  write_script)
 import exps.doe as doe
 from linres import LinRes
 from multi import multiload, multiplot, multibode, multinyquist
@@ -0,0 +1,44 @@
+#!/usr/bin/python
+"""Command-line interface of ModelicaRes
+
+Currently, there is one command, ``serve``, which starts a
+:class:`~modelicares.server.ResultServer`::
+
+   python -m modelicares serve [--host HOST] [--port PORT] [--budget MiB]
+
+The budget is the memory for the loaded results in MiB (default: the budget
+of :mod:`modelicares.cache`).  Use
+:class:`~modelicares.server.RemoteSimRes` to query the server.
+"""
+__author__ = "Kevin Davies"
+__email__ = "kdavies4@gmail.com"
+__copyright__ = "Copyright 2012-2013, Georgia Tech Research Corporation"
+__license__ = "BSD-compatible (see LICENSE.txt)"
+
+from argparse import ArgumentParser
+
+
+def main(args=None):
+    """Parse the command-line arguments and run the command.
+    """
+    from modelicares.server import DEFAULT_ADDRESS, serve
+
+    parser = ArgumentParser(prog='python -m modelicares')
+    commands = parser.add_subparsers(dest='command')
+    server = commands.add_parser('serve', help="serve simulation results "
+                                 "from memory")
+    server.add_argument('--host', default=DEFAULT_ADDRESS[0],
+                        help="host name (default: %(default)s)")
+    server.add_argument('--port', type=int, default=DEFAULT_ADDRESS[1],
+                        help="port (default: %(default)s)")
+    server.add_argument('--budget', type=float,
+                        help="memory for loaded results in MiB")
+    opts = parser.parse_args(args)
+
+    if opts.command == 'serve':
+        budget = None if opts.budget is None else int(opts.budget*2**20)
+        serve((opts.host, opts.port), budget)
+
+
+if __name__ == '__main__':
+    main()
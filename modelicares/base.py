@@ -21,6 +21,9 @@ and the following functions:
 
 - :meth:`animate` - Encodes a series of PNG images as a MPG movie
 
+- :meth:`animate_figure` - Renders frames of a figure in memory and streams
+  them to a video encoder
+
 - :meth:`color` - Plots 2D scalar data on a color axis in 2D Cartesian
   coordinates
 
@@ -28,6 +31,9 @@ and the following functions:
 
 - :meth:`convert` - Converts the expression of a physical quantity between units
 
+- :meth:`downsample` - Reduces a trajectory to the points that are visible at a
+  given horizontal resolution
+
 - :meth:`expand_path` - Expands a file path by replacing '~' with the user
   directory and makes the path absolute
 
@@ -74,19 +80,24 @@ __copyright__ = "Copyright 2012-2013, Georgia Tech Research Corporation"
 __license__ = "BSD-compatible (see LICENSE.txt)"
 
 import os
-import wx
+import time
 import numpy as np
-import matplotlib.pyplot as plt
 
 from collections import MutableMapping, namedtuple
 from itertools import cycle
 from decimal import Decimal
 from math import floor
 from matplotlib import rcParams
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba_array
 from matplotlib.lines import Line2D
+from matplotlib.path import Path
 from matplotlib.cbook import iterable
 
 
+_COLLECTION_GID = 'modelicares.base.plot'
+"""Group id of the line collection created by :meth:`plot`"""
+
 Quantity = namedtuple('Quantity', ['number', 'factor', 'offset', 'unit'])
 """Named tuple class for a constant physical quantity
 
@@ -159,6 +170,7 @@ def add_arrows(p, x_locs=[0], xstar_offset=0, ystar_offset=0,
 
           Example of add_arrows()
     """
+    import matplotlib.pyplot as plt
     from math import atan, cos, sin
 
     # Get data from the plot lines object.
@@ -261,6 +273,8 @@ def add_hlines(ax=None, positions=[0], labels=[], **kwargs):
 
           Example of add_hlines()
     """
+    import matplotlib.pyplot as plt
+
     # Process the inputs.
     if not ax:
         ax = plt.gca()
@@ -332,6 +346,8 @@ def add_vlines(ax=None, positions=[0], labels=[], **kwargs):
 
           Example of add_vlines()
     """
+    import matplotlib.pyplot as plt
+
     # Process the inputs.
     if not ax:
         ax = plt.gca()
@@ -373,6 +389,8 @@ def animate(imagebase='_tmp', fname="animation", fps=10, clean=False):
 
     .. _mencoder: http://en.wikipedia.org/wiki/MEncoder
 
+    .. Seealso:: :meth:`animate_figure`, which does not write image files
+
     **Example:**
 
     .. code-block:: python
@@ -413,6 +431,207 @@ def animate(imagebase='_tmp', fname="animation", fps=10, clean=False):
             os.remove(image)
 
 
+def animate_figure(fig, update, frames, fname="animation", fps=10,
+                   encoder='ffmpeg', workers=None):
+    """Render frames of a figure in memory and stream them to a video encoder.
+
+    Each frame is drawn to an RGBA buffer and written to the standard input of
+    the encoder process, so no image files are created.
+
+    **Arguments:**
+
+    - *fig*: :class:`matplotlib.figure.Figure` to be animated
+
+    - *update*: Function that updates the figure for a frame
+
+         It is called as *update(fig, frame)*.  It must reach the artists
+         (axes, lines, etc.) only through *fig* (e.g., ``fig.axes[0].lines[0]``)
+         rather than by closing over them or by global variables, since the
+         frames may be rendered from copies of the figure (see *workers*).
+         The size of the figure should not be changed.
+
+    - *frames*: Iterable of the frame arguments (e.g., times)
+
+    - *fname*: Filename for the movie
+
+         If there is no extension, ".mp4" is appended for ffmpeg_ or ".mpg"
+         for mencoder_.
+
+    - *fps*: Number of frames per second
+
+    - *encoder*: 'ffmpeg' or 'mencoder'
+
+    - *workers*: Number of processes used to render the frames in parallel
+
+         If *workers* is *None* or 1, the frames are rendered in this process.
+         Otherwise, the figure is pickled to a pool of processes and each
+         process updates its own copy.  Then *update* must be a module-level
+         function, it must not refer to artists except through *fig* (a
+         :class:`ValueError` is raised if it is a closure or uses a global
+         artist), and each call must fully determine the frame (not depend on
+         the previous frames).  The frames are encoded in order.  Use 0 for
+         one process per CPU.
+
+    If the encoder fails, an :class:`IOError` is raised with its error
+    output.
+
+    .. Note:: This function requires ffmpeg_ or mencoder_.  On Linux, install
+       one with ``sudo apt-get install ffmpeg`` or ``sudo apt-get install
+       mencoder``.
+
+    .. _ffmpeg: http://www.ffmpeg.org/
+
+    **Example:**
+
+    .. code-block:: python
+
+       import matplotlib.pyplot as plt
+       import numpy as np
+       from modelicares import *
+
+       fig = plt.figure(figsize=(5,5))
+       ax = fig.add_subplot(111)
+       x = np.linspace(0, 2*np.pi, 100)
+       ax.plot(x, np.sin(x))
+
+       def update(fig, t):
+           line = fig.axes[0].lines[0]
+           line.set_ydata(np.sin(x - t))
+
+       # Assemble the frames into a movie.
+       animate_figure(fig, update, np.linspace(0, 2*np.pi, 50))
+    """
+    import errno
+    import subprocess
+    from tempfile import TemporaryFile
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    assert encoder in ['ffmpeg', 'mencoder'], (
+        'The encoder must be "ffmpeg" or "mencoder".')
+    parallel = workers is not None and workers != 1
+    if parallel:
+        _check_frame_update(update)
+    if not os.path.splitext(fname)[1]:
+        fname += '.mp4' if encoder == 'ffmpeg' else '.mpg'
+
+    # Render the frames with Agg.
+    original_canvas = fig.canvas
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    width, height = [int(dim) for dim in canvas.get_width_height()]
+
+    # Start the encoder.
+    if encoder == 'ffmpeg':
+        command = ['ffmpeg', '-y', '-loglevel', 'error',
+                   '-f', 'rawvideo', '-pix_fmt', 'rgba',
+                   '-s', '%ix%i' % (width, height), '-r', str(fps), '-i', '-',
+                   # Most codecs need even dimensions.
+                   '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+                   '-an', '-vcodec', 'mpeg4', '-q:v', '3', fname]
+    else:
+        command = ['mencoder', '-really-quiet', '-demuxer', 'rawvideo',
+                   '-rawvideo', 'w=%i:h=%i:format=rgba:fps=%i'
+                   % (width, height, fps),
+                   '-ovc', 'lavc', '-lavcopts', 'vcodec=wmv2', '-o', fname,
+                   '-']
+    print('Making movie "%s".  This may take a while.' % fname)
+    errors = TemporaryFile() # Error output of the encoder
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=errors)
+
+    # Write the frames.
+    pool = None
+    broken = False
+    try:
+        if not parallel:
+            for frame in frames:
+                update(fig, frame)
+                canvas.draw()
+                process.stdin.write(canvas.buffer_rgba())
+        else:
+            import cPickle as pickle
+            from multiprocessing import Pool
+
+            fig.set_canvas(original_canvas) # Don't pickle the Agg canvas.
+            pool = Pool(workers if workers else None,
+                        initializer=_init_frame_worker,
+                        initargs=(pickle.dumps(fig, pickle.HIGHEST_PROTOCOL),
+                                  update))
+            for buf in pool.imap(_render_frame, frames):
+                process.stdin.write(buf)
+    except IOError as error:
+        if error.errno != errno.EPIPE:
+            raise
+        broken = True # The encoder exited early; report its errors below.
+    finally:
+        if pool is not None:
+            if broken:
+                pool.terminate()
+            else:
+                pool.close()
+            pool.join()
+        try:
+            process.stdin.close()
+        except IOError:
+            pass
+        process.wait()
+        fig.set_canvas(original_canvas)
+    if broken or process.returncode != 0:
+        errors.seek(0)
+        raise IOError('The %s encoder failed with exit code %i:\n%s'
+                      % (encoder, process.returncode, errors.read().strip()))
+
+
+# Figure and update function of an animation worker process (see
+# animate_figure())
+_frame_worker = {}
+
+
+def _check_frame_update(update):
+    """Raise a :class:`ValueError` if the update function of
+    :meth:`animate_figure` refers to artists other than through the figure,
+    since those aren't the artists that the worker processes render.
+    """
+    from matplotlib.artist import Artist
+
+    if getattr(update, '__closure__', None):
+        raise ValueError("With several workers, the update function of "
+                         "animate_figure() must not be a closure.  Reach the "
+                         "artists through the figure (its first argument).")
+    if not hasattr(update, '__code__'):
+        return # Not a Python function (e.g., a callable instance)
+    names = [name for name in update.__code__.co_names
+             if isinstance(update.__globals__.get(name), Artist)]
+    if names:
+        raise ValueError("With several workers, the update function of "
+                         "animate_figure() must reach the artists through the "
+                         "figure (its first argument), not global variables "
+                         "(%s)." % ', '.join(names))
+
+
+def _init_frame_worker(pickled_fig, update):
+    """Set up a process to render frames (see :meth:`animate_figure`).
+    """
+    import cPickle as pickle
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    plt.switch_backend('Agg')
+    fig = pickle.loads(pickled_fig)
+    _frame_worker['canvas'] = FigureCanvasAgg(fig)
+    _frame_worker['fig'] = fig
+    _frame_worker['update'] = update
+
+
+def _render_frame(frame):
+    """Render a frame in a worker process and return the RGBA buffer (see
+    :meth:`animate_figure`).
+    """
+    _frame_worker['update'](_frame_worker['fig'], frame)
+    canvas = _frame_worker['canvas']
+    canvas.draw()
+    return str(canvas.buffer_rgba())
+
+
 def color(ax, c, *args, **kwargs):
     """Plot 2D scalar data on a color axis in 2D Cartesian coordinates.
 
@@ -499,6 +718,69 @@ def convert(quantity):
     return quantity.number*quantity.factor + quantity.offset
 
 
+def downsample(x, y, n):
+    """Reduce a trajectory to the points that are visible at a given
+    horizontal resolution.
+
+    The x-axis range is divided into *n* equal buckets (e.g., one per pixel).
+    The first, last, minimum, and maximum points of each bucket are kept, so
+    the plotted envelope is the same as that of the full trajectory.  Points
+    at repeated x values (e.g., events in a simulation) are kept as well, so
+    discontinuities are preserved.
+
+    **Arguments:**
+
+    - *x*: Monotonically increasing x-axis data
+
+    - *y*: y-axis data
+
+    - *n*: Number of buckets
+
+    If there are no more than 4*n* points, then the data is returned as is.
+
+    **Returns:** Tuple of the reduced x-axis and y-axis data
+
+    **Example:**
+
+    .. code-block:: python
+
+       >>> import numpy as np
+       >>> from modelicares import *
+
+       >>> x = np.linspace(0, 1, 10001)
+       >>> y = np.sin(40*np.pi*x)
+       >>> x_d, y_d = downsample(x, y, 100)
+       >>> len(x_d) <= 400
+       True
+       >>> y_d.min() == y.min(), y_d.max() == y.max()
+       (True, True)
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) <= 4*n:
+        return x, y
+
+    # Assign each point to a bucket.
+    edges = np.linspace(x[0], x[-1], n + 1)
+    bucket = np.clip(np.searchsorted(edges, x, side='right') - 1, 0, n - 1)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    ends = np.concatenate((starts[1:], [len(x)])) - 1
+    counts = ends - starts + 1
+
+    # Find the indices of the first extreme in each bucket.  NaNs are ignored.
+    indices = [starts, ends]
+    for extreme in [np.fmin.reduceat(y, starts), np.fmax.reduceat(y, starts)]:
+        hits = np.flatnonzero(y == np.repeat(extreme, counts))
+        indices.append(hits[np.unique(bucket[hits], return_index=True)[1]])
+
+    # Keep both sides of the discontinuities.
+    events = np.flatnonzero(np.diff(x) == 0)
+    indices += [events, events + 1]
+
+    i = np.unique(np.concatenate(indices))
+    return x[i], y[i]
+
+
 def expand_path(path):
     r"""Expand a file path by replacing '~' with the user directory and making
     the path absolute.
@@ -599,6 +881,9 @@ def figure(label='', *args, **kwargs):
 
     .. code-block:: python
 
+       >>> import matplotlib.pyplot as plt
+       >>> from modelicares import *
+
        >>> fig = figure("velocity_vs_time") # doctest: +ELLIPSIS
        >>> plt.getp(fig, 'label')
        'velocity_vs_time'
@@ -606,6 +891,8 @@ def figure(label='', *args, **kwargs):
     .. Note::  The *label* property is used as the base filename in the
        :meth:`saveall` method.
     """
+    import matplotlib.pyplot as plt
+
     fig = plt.figure(*args, **kwargs)
     plt.setp(fig, 'label', label)
     # Note:  As of matplotlib 1.2, matplotlib.pyplot.figure(label=label) isn't
@@ -843,8 +1130,8 @@ def load_csv(fname, header_row=0, first_data_row=None, types=None, **kwargs):
 def plot(y, x=None, ax=None, label=None,
          color=['b', 'g', 'r', 'c', 'm', 'y', 'k'],
          marker=None,
-         dashes=[(None,None), (3,3), (1,1), (3,2,1,2)],
-         **kwargs):
+         dashes=[(None,None), (3,3), (1,1), (3,2,1,2)], decimate=None,
+         collection=False, **kwargs):
     """Plot 1D scalar data as points and/or line segments in 2D Cartesian
     coordinates.
 
@@ -895,9 +1182,34 @@ def plot(y, x=None, ax=None, label=None,
 
          .. Seealso:: http://matplotlib.sourceforge.net/api/collections_api.html
 
+    - *decimate*: *None* to plot all of the points, 'auto' to reduce each
+      series to the points that are visible at the resolution of the axes, or
+      the number of horizontal buckets (see :meth:`downsample`)
+
+         With 'auto', the resolution is the width of the axes in pixels at the
+         larger of the figure's dpi and the dpi for saving.  The series are
+         reduced again when the x-axis limits are changed (e.g., upon zooming),
+         so the full data is kept in memory.  Only series with monotonically
+         increasing x-axis data are reduced.
+
+    - *collection*: If *True*, draw all of the series on the axes as a single
+      :class:`matplotlib.collections.LineCollection` instead of a
+      :class:`~matplotlib.lines.Line2D` per series
+
+         This is much faster for many series (e.g., an ensemble of
+         simulations).  Later calls with *collection=True* on the same axes
+         extend the same collection.  The colors and dash styles are cycled as
+         usual, but *marker* is ignored and *kwargs* apply to the whole
+         collection.  If *label* is given, an empty
+         :class:`~matplotlib.lines.Line2D` is added for each series as a proxy
+         for the legend.  With *decimate*, the series are reduced only once.
+
     - *\*\*kwargs*: Additional arguments for :meth:`matplotlib.pyplot.plot`
+      (or :class:`matplotlib.collections.LineCollection` if *collection* is
+      *True*)
 
-    **Returns:** List of :class:`matplotlib.lines.Line2D` objects
+    **Returns:** List of :class:`matplotlib.lines.Line2D` objects (or the
+    :class:`matplotlib.collections.LineCollection` if *collection* is *True*)
 
     **Example:**
 
@@ -935,6 +1247,7 @@ def plot(y, x=None, ax=None, label=None,
     """
     # Create axes if necessary.
     if not ax:
+        import matplotlib.pyplot as plt
         fig = plt.figure()
         ax = fig.add_subplot(111)
 
@@ -961,26 +1274,117 @@ def plot(y, x=None, ax=None, label=None,
     # Plot the data.
     if x is None:
         # There is no x data; plot y vs its indices.
-        plots = [ax.plot(yi, label=None if label is None else label[i],
-                         color=color.next(), marker=marker.next(),
-                         dashes=dashes.next(), **kwargs)
-                 for i, yi in enumerate(y)]
+        x = [np.arange(len(yi)) for yi in y]
     elif not iterable(x[0]):
         # There is only one x series; use it repeatedly.
-        plots = [ax.plot(x, yi, label=None if label is None else label[i],
-                         color=color.next(), marker=marker.next(),
-                         dashes=dashes.next(), **kwargs)
-                 for i, yi in enumerate(y)]
-    else:
-        # There is a x series for each y series.
+        x = [x]*len(y)
+    # Otherwise, there is a x series for each y series.
+    if collection:
+        return _plot_collection(ax, x, y, label, color, dashes, decimate,
+                                **kwargs)
+    if not decimate:
         plots = [ax.plot(xi, yi, label=None if label is None else label[i],
                          color=color.next(), marker=marker.next(),
                          dashes=dashes.next(), **kwargs)
                  for i, (xi, yi) in enumerate(zip(x, y))]
+        return plots
+
+    # Reduce the data before plotting it.
+    n = _n_buckets(ax) if decimate == 'auto' else decimate
+    plots = []
+    series = [] # (line, x, y) with the full data
+    for i, (xi, yi) in enumerate(zip(x, y)):
+        xi = np.asarray(xi)
+        yi = np.asarray(yi)
+        monotonic = len(xi) > 1 and np.all(np.diff(xi) >= 0)
+        xi_d, yi_d = downsample(xi, yi, n) if monotonic else (xi, yi)
+        lines = ax.plot(xi_d, yi_d, label=None if label is None else label[i],
+                        color=color.next(), marker=marker.next(),
+                        dashes=dashes.next(), **kwargs)
+        if monotonic:
+            series.append((lines[0], xi, yi))
+        plots.append(lines)
+
+    # Reduce the data again when the x-axis limits change.
+    def _redecimate(changed_ax):
+        n_new = _n_buckets(ax) if decimate == 'auto' else decimate
+        x_min, x_max = sorted(changed_ax.get_xlim())
+        for line, xi, yi in series:
+            # Include one point beyond each side of the view.
+            i_min = max(np.searchsorted(xi, x_min, side='left') - 1, 0)
+            i_max = np.searchsorted(xi, x_max, side='right') + 1
+            line.set_data(*downsample(xi[i_min:i_max], yi[i_min:i_max], n_new))
+
+    if series:
+        # Axes that share the x axis (e.g., from twinx()) are updated without
+        # emitting the event, so connect to all of them.
+        for shared_ax in ax.get_shared_x_axes().get_siblings(ax):
+            shared_ax.callbacks.connect('xlim_changed', _redecimate)
 
     return plots
 
 
+def _plot_collection(ax, x, y, label, color, dashes, decimate, **kwargs):
+    """Add series to the line collection of a set of axes (see :meth:`plot`).
+    """
+    n = _n_buckets(ax) if decimate == 'auto' else decimate
+    segments = []
+    colors = []
+    styles = []
+    for i, (xi, yi) in enumerate(zip(x, y)):
+        xi = np.asarray(xi)
+        yi = np.asarray(yi)
+        if decimate and len(xi) > 1 and np.all(np.diff(xi) >= 0):
+            xi, yi = downsample(xi, yi, n)
+        segments.append(np.column_stack((xi, yi)))
+        c = color.next()
+        d = dashes.next()
+        colors.append(c)
+        styles.append('solid' if tuple(d) == (None, None) else (0, d))
+        if label is not None:
+            ax.add_line(Line2D([], [], color=c, dashes=d, label=label[i]))
+
+    # Extend the existing collection, if any.
+    for coll in ax.collections:
+        if coll.get_gid() == _COLLECTION_GID:
+            # Only the new paths are created.
+            coll.get_paths().extend(Path(segment) for segment in segments)
+            coll.set_color(np.concatenate((coll.get_colors(),
+                                           to_rgba_array(colors))))
+            coll.series_styles += styles
+            coll.set_linestyle(coll.series_styles)
+            coll.update(kwargs)
+            coll.stale = True
+            break
+    else:
+        coll = LineCollection(segments, colors=colors, linestyles=styles,
+                              gid=_COLLECTION_GID, **kwargs)
+        # Keep the original dash styles (matplotlib scales them by the line
+        # width).
+        coll.series_styles = styles
+        ax.add_collection(coll, autolim=False)
+
+    # Update the data limits.
+    points = np.concatenate(segments) if segments else np.empty((0, 2))
+    points = points[np.all(np.isfinite(points), axis=1)]
+    if len(points):
+        ax.update_datalim(points)
+        ax.autoscale_view()
+
+    return coll
+
+
+def _n_buckets(ax):
+    """Return the width of a set of axes in pixels at the larger of the
+    figure's dpi and the dpi for saving.
+    """
+    fig = ax.get_figure()
+    dpi = rcParams['savefig.dpi']
+    if not isinstance(dpi, (int, float)):
+        dpi = fig.dpi # rcParams['savefig.dpi'] is 'figure'.
+    return max(int(np.ceil(ax.bbox.width*max(dpi, fig.dpi)/fig.dpi)), 1)
+
+
 def quiver(ax, u, v, x=None, y=None, pad=0.05, pivot='middle', **kwargs):
     """Plot 2D vector data as arrows in 2D Cartesian coordinates.
 
@@ -1036,6 +1440,8 @@ def quiver(ax, u, v, x=None, y=None, pad=0.05, pivot='middle', **kwargs):
 
           Example of quiver()
     """
+    import matplotlib.pyplot as plt
+
     if x is None or y is None:
         p = ax.quiver(u, v, pivot=pivot, **kwargs)
     else:
@@ -1087,11 +1493,7 @@ def save(formats=['pdf', 'png'], fbase='1'):
     .. Note::  The :meth:`figure` method can be used to directly create a
        figure with a label.
     """
-    from wx import DirSelector, App
-
-    # Initialize a dummy wx.App instance.  Dialogs can only be called after
-    # this is done [http://warp.byu.edu/site/content/131, accessed 10/9/2012].
-    app = App()
+    import matplotlib.pyplot as plt
 
     # If formats is a singleton, turn it into a list.
     if not type(formats) is list:
@@ -1104,24 +1506,15 @@ def save(formats=['pdf', 'png'], fbase='1'):
     (directory, fbase_fig) = os.path.split(plt.getp(fig, 'label'))
     if not fbase_fig:
         if not directory:
-            # Initialize a dummy wx.App instance.  Dialogs can only be
-            # called after this is done
-            # [http://code.google.com/p/easywx/, accessed 10/7/2012].
-            #app = App()
-            directory = DirSelector("Choose a directory for the images.",
-                                    defaultPath=os.path.join(*['..']*4))
+            directory = _choose_directory()
             if not directory:
                 return
     else:
         fbase = fbase_fig
-    if directory and not os.path.isdir(directory):
-        os.mkdir(directory)
-    for format in formats:
-        fname = os.path.join(directory, fbase + '.' + format)
-        fig.savefig(fname, format=format)
+    for fname in _save_figure(fig, os.path.join(directory, fbase), formats):
         print("Saved " + fname)
 
-def saveall(formats=['pdf', 'png']):
+def saveall(formats=['pdf', 'png'], workers=None):
     """Save all open figures as images in a format or list of formats.
 
     The directory and base filenames are taken from the *label* property of the
@@ -1130,10 +1523,23 @@ def saveall(formats=['pdf', 'png']):
     property is empty, then a directory dialog is opened to chose a directory.
     In that case, the figures are saved as a sequence of numbers.
 
+    The dialog is the only part that requires wxPython, so figures with labels
+    can be saved on a headless machine (e.g., with the 'Agg' backend).
+
     **Arguments:**
 
     - *formats*: Format or list of formats in which the figures should be saved
 
+    - *workers*: Number of processes used to render the figures in parallel
+
+         If *workers* is *None* or 1, the figures are saved one by one in
+         this process.  Otherwise, the figures are pickled and rendered by a
+         pool of processes using the 'Agg' backend.  A figure that cannot be
+         pickled is saved in this process.  Use 0 for one process per CPU.
+
+    **Returns:** Dictionary of the time (in seconds) spent saving each figure,
+    keyed by the path and base filename
+
     .. Note::  In general, :meth:`saveall` should be called before
        :meth:`matplotlib.pyplot.show` so that the figure(s) are still present
        in memory.
@@ -1152,19 +1558,17 @@ def saveall(formats=['pdf', 'png']):
        <matplotlib.figure.Figure object at 0x...>
        >>> plt.plot(range(10)) # doctest: +ELLIPSIS
        [<matplotlib.lines.Line2D object at 0x...>]
-       >>> save()
+       >>> times = saveall(workers=2)
        Saved temp_plot.pdf
        Saved temp_plot.png
+       >>> list(times) == ['temp_plot']
+       True
 
     .. Note::  The :meth:`figure` method can be used to directly create a
        figure with a label.
     """
+    import matplotlib.pyplot as plt
     from matplotlib._pylab_helpers import Gcf
-    from wx import DirSelector, App
-
-    # Initialize a dummy wx.App instance.  Dialogs can only be called after
-    # this is done [http://warp.byu.edu/site/content/131, accessed 10/9/2012].
-    app = App()
 
     # If formats is a singleton, turn it into a list.
     if not type(formats) is list:
@@ -1173,9 +1577,10 @@ def saveall(formats=['pdf', 'png']):
     # Find the figures.
     figs = [manager.canvas.figure for manager in Gcf.get_all_fig_managers()]
 
-    # Save the figures, creating folders as necessary.
+    # Determine the file names.
     chosen_directory = None
     i = 0
+    jobs = []
     for fig in figs:
         (directory, fbase) = os.path.split(plt.getp(fig, 'label'))
         if not fbase:
@@ -1183,22 +1588,97 @@ def saveall(formats=['pdf', 'png']):
             i += 1
             if not directory:
                 if chosen_directory is None:
-                    # Initialize a dummy wx.App instance.  Dialogs can only be
-                    # called after this is done
-                    # [http://code.google.com/p/easywx/, accessed 10/7/2012].
-                    #app = App()
-                    chosen_directory = DirSelector(
-                        "Choose a directory for the images.",
-                        defaultPath=os.path.join(*['..']*4))
+                    chosen_directory = _choose_directory()
                     if not chosen_directory:
-                        return
+                        return {}
                 directory = chosen_directory
-        if directory and not os.path.isdir(directory):
-            os.mkdir(directory)
-        for format in formats:
-            fname = os.path.join(directory, fbase + '.' + format)
-            fig.savefig(fname, format=format)
-            print("Saved " + fname)
+        jobs.append((fig, os.path.join(directory, fbase)))
+
+    # Save the figures, creating folders as necessary.
+    times = {}
+    if workers is None or workers == 1 or len(jobs) < 2:
+        for fig, path in jobs:
+            start = time.time()
+            for fname in _save_figure(fig, path, formats):
+                print("Saved " + fname)
+            times[path] = time.time() - start
+        return times
+
+    import cPickle as pickle
+    from multiprocessing import Pool
+
+    pickled = []
+    for fig, path in jobs:
+        try:
+            pickled.append((pickle.dumps(fig, pickle.HIGHEST_PROTOCOL), path,
+                            formats))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # Save the figure here instead.
+            start = time.time()
+            for fname in _save_figure(fig, path, formats):
+                print("Saved " + fname)
+            times[path] = time.time() - start
+    pool = Pool(workers if workers else None)
+    try:
+        for path, fnames, elapsed in pool.imap(_save_pickled, pickled):
+            for fname in fnames:
+                print("Saved " + fname)
+            times[path] = elapsed
+    finally:
+        pool.close()
+        pool.join()
+    return times
+
+
+def _choose_directory():
+    """Ask the user for a directory using a dialog.
+
+    If the dialog is cancelled, '' is returned.
+    """
+    from wx import DirSelector, App
+
+    # Initialize a dummy wx.App instance.  Dialogs can only be called after
+    # this is done [http://warp.byu.edu/site/content/131, accessed 10/9/2012].
+    app = App()
+    return DirSelector("Choose a directory for the images.",
+                       defaultPath=os.path.join(*['..']*4))
+
+
+def _save_figure(fig, path, formats):
+    """Save a figure in a list of formats and return the file names.
+
+    *path* is the directory and base filename.  Folders are created as
+    necessary.
+    """
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            # Another process may have created it.
+            if not os.path.isdir(directory):
+                raise
+    fnames = []
+    for format in formats:
+        fname = path + '.' + format
+        fig.savefig(fname, format=format)
+        fnames.append(fname)
+    return fnames
+
+
+def _save_pickled(job):
+    """Unpickle and save a figure in a worker process (see :meth:`saveall`).
+    """
+    import cPickle as pickle
+    import matplotlib.pyplot as plt
+
+    start = time.time()
+    plt.switch_backend('Agg')
+    pickled, path, formats = job
+    fig = pickle.loads(pickled)
+    fnames = _save_figure(fig, path, formats)
+    plt.close(fig)
+    return path, fnames, time.time() - start
 
 def setup_subplots(n_plots, n_rows, title="", subtitles=None,
                    label="multiplot",
@@ -0,0 +1,183 @@
+#!/usr/bin/python
+"""Process-wide cache of loaded results
+
+Loading a large result file takes much longer than looking up its data in
+memory.  The :class:`ResultCache` class keeps recently loaded results, up to a
+memory budget, and discards the least recently used ones first.  The entries
+are keyed by the absolute path of the file and its identity (size,
+modification time, and inode), so a file that is rewritten is loaded again.
+
+:class:`~modelicares.simres.SimRes` goes through the process-wide instance,
+*results*, so :meth:`~modelicares.multi.multiload`, the variable browser, and
+:mod:`loadres` share the same cache.
+
+**Example:**
+
+.. code-block:: python
+
+   >>> from modelicares import SimRes, cache
+
+   >>> cache.results.clear()
+   >>> sim = SimRes('examples/ChuaCircuit.mat')
+   >>> sim = SimRes('examples/ChuaCircuit.mat')
+   >>> stats = cache.results.stats()
+   >>> stats.hits, stats.misses, stats.entries
+   (1, 1, 1)
+
+   >>> # The budget can be adjusted (in bytes).  Use 0 to disable caching.
+   >>> cache.results.set_budget(512*2**20)
+"""
+__author__ = "Kevin Davies"
+__email__ = "kdavies4@gmail.com"
+__copyright__ = "Copyright 2012-2013, Georgia Tech Research Corporation"
+__license__ = "BSD-compatible (see LICENSE.txt)"
+
+
+import os
+
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+
+DEFAULT_BUDGET = 256*2**20
+"""Default memory budget of the process-wide cache (in bytes)"""
+
+CacheStats = namedtuple('CacheStats', ['hits', 'misses', 'evictions',
+                                       'entries', 'bytes', 'budget'])
+"""Named tuple class for the statistics of a :class:`ResultCache`"""
+
+
+class ResultCache(object):
+    """Least-recently-used cache of loaded results with a memory budget
+
+    **Initialization arguments:**
+
+    - *budget*: Maximum number of bytes held by the cache
+
+    The methods are thread-safe.
+    """
+
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self._budget = budget
+        self._entries = OrderedDict() # key: (value, nbytes)
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = Lock()
+
+    def key(self, fname, *tags):
+        """Return the key of a file in the cache.
+
+        **Arguments:**
+
+        - *fname*: Name of the file (may include the path)
+
+             The file extension ('.mat') is optional.
+
+        - *\*tags*: Additional hashable entries to distinguish different
+          contents loaded from the same file (e.g., loading options)
+
+        The key includes the absolute path and the size, modification time,
+        and inode of the file.  If the file cannot be found, then *None* is
+        returned.
+        """
+        if not os.path.isfile(fname) and os.path.isfile(fname + '.mat'):
+            fname += '.mat'
+        try:
+            stat = os.stat(fname)
+        except OSError:
+            return None
+        return ((os.path.abspath(fname),) + tags
+                + (stat.st_size, stat.st_mtime, stat.st_ino))
+
+    def get(self, key):
+        """Return the cached value for *key* or *None* if there is none.
+        """
+        with self._lock:
+            if key is None or key not in self._entries:
+                self._misses += 1
+                return None
+            self._hits += 1
+            value, nbytes = self._entries.pop(key)
+            self._entries[key] = (value, nbytes) # Mark as most recently used.
+            return value
+
+    def put(self, key, value, nbytes):
+        """Add a value to the cache.
+
+        **Arguments:**
+
+        - *key*: Key from :meth:`key`
+
+             If *key* is *None*, then nothing is cached.
+
+        - *value*: Value to be cached
+
+        - *nbytes*: Memory held by the value (in bytes)
+
+        Entries for older versions of the same file are discarded.  If the
+        value is larger than the budget, then it is not cached.
+        """
+        if key is None:
+            return
+        with self._lock:
+            # Drop any entries for previous versions of the file.
+            n_tags = len(key) - 3
+            for old in [old for old in self._entries
+                        if old[:n_tags] == key[:n_tags]]:
+                self._bytes -= self._entries.pop(old)[1]
+            if nbytes > self._budget:
+                return
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            self._evict()
+
+    def clear(self):
+        """Remove all of the entries and reset the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def set_budget(self, budget):
+        """Set the maximum number of bytes held by the cache.
+
+        Least recently used entries are discarded as necessary.
+        """
+        with self._lock:
+            self._budget = budget
+            self._evict()
+
+    def stats(self):
+        """Return the statistics of the cache as an instance of
+        :class:`CacheStats`.
+        """
+        with self._lock:
+            return CacheStats(hits=self._hits, misses=self._misses,
+                              evictions=self._evictions,
+                              entries=len(self._entries), bytes=self._bytes,
+                              budget=self._budget)
+
+    def _evict(self):
+        """Discard the least recently used entries until the budget is met.
+
+        The lock must be held by the caller.
+        """
+        while self._bytes > self._budget and self._entries:
+            self._bytes -= self._entries.popitem(last=False)[1][1]
+            self._evictions += 1
+
+
+results = ResultCache()
+"""Process-wide cache used by :class:`~modelicares.simres.SimRes`"""
+
+
+if __name__ == '__main__':
+    """Test the contents of this file."""
+    import doctest
+    doctest.testmod()
+    exit()
@@ -32,13 +32,18 @@ __license__ = "BSD-compatible (see LICENSE.txt)"
 
 
 import os
+import sys
 import re
+import json
+import heapq
+import shutil
+import hashlib
 import numpy as np
 import modelicares.base as base
 import doe
 
-from itertools import count
-from collections import namedtuple
+from itertools import count, izip
+from collections import Mapping, namedtuple
 from datetime import date
 from types import GeneratorType
 
@@ -61,7 +66,193 @@ differences in the entries (see those functions for details).
    'ChuaCircuit'
 """
 
-def gen_experiments(models=None, params={}, args={}, design=doe.fullfact):
+
+class ExperimentSet(object):
+    """Compact set of simulation experiments
+
+    The parameters are stored as columns of values (NumPy_ arrays) that share
+    one tuple of names, rather than as a dictionary for each experiment.  The
+    experiments (instances of :class:`Experiment`) are created only as they
+    are accessed, and their parameters are :class:`ParamRow` views that print
+    as Modelica_ modifiers from a template made once for the set.  This saves
+    memory and time for large designs of experiments.
+
+    An instance may be passed to :meth:`write_script` or :meth:`run_models`
+    in place of a list or generator of experiments.  :meth:`gen_experiments`
+    returns an instance if *compact* is *True*.
+
+    **Initialization arguments:**
+
+    - *models*: Name of the model (for all of the experiments) or list of
+      names (one for each experiment)
+
+    - *params*: Dictionary of lists or arrays of parameter values (one for each
+      experiment) by parameter name or list of pairs of names and values
+
+         The names may be nested as in :meth:`gen_experiments`.  The order of
+         a list of pairs is kept; otherwise, the names are sorted.
+
+    - *args*: Dictionary of lists or arrays of command arguments (one for each
+      experiment) by keyword
+
+    **Example:**
+
+    .. code-block:: python
+
+       >>> from modelicares import *
+
+       >>> experiments = ExperimentSet('Modelica.Electrical.Analog.Examples.ChuaCircuit',
+       ...                             {'L.L': [16, 18], 'C2.C': [80, 100]},
+       ...                             {'stopTime': [2500, 2500]})
+       >>> len(experiments)
+       2
+       >>> experiments.names
+       ('C2.C', 'L.L')
+       >>> for experiment in experiments:
+       ...     print(experiment.model + str(experiment.params))
+       Modelica.Electrical.Analog.Examples.ChuaCircuit(C2(C=80), L(L=16))
+       Modelica.Electrical.Analog.Examples.ChuaCircuit(C2(C=100), L(L=18))
+       >>> experiments[-1].args
+       {'stopTime': 2500}
+
+       >>> # Values of different types aren't converted:
+       >>> ExperimentSet('ChuaCircuit', {'L.L': [16, 18.5]})[0].params['L.L']
+       16
+    """
+    BLOCK_SIZE = 4096
+    """Number of experiments that are read from the columns at once during
+    iteration"""
+
+    def __init__(self, models, params={}, args={}):
+        def _columns(items):
+            """Return the names and columns of a dictionary or list of pairs.
+            """
+            if isinstance(items, dict):
+                items = sorted(base.flatten_dict(items).items())
+            return (tuple(name for name, values in items),
+                    [_column(values) for name, values in items])
+
+        self.names, self.columns = _columns(params)
+        self.arg_names, self.arg_columns = _columns(args)
+        lengths = set(len(column)
+                      for column in self.columns + self.arg_columns)
+        if isinstance(models, basestring) or models is None:
+            self.models = [models]
+            n_experiments = lengths.pop() if lengths else 1
+            self._model_index = np.zeros(n_experiments, dtype=int)
+        else:
+            models, self._model_index = np.unique(_column(models),
+                                                  return_inverse=True)
+            self.models = models.tolist()
+            lengths.add(len(self._model_index))
+        assert len(lengths) <= 1, ("The lists of models, parameter values, and "
+                                   "arguments must have the same length.")
+        self._modifiers = _Modifiers(self.names)
+
+    @classmethod
+    def from_rows(cls, rows, names, arg_names=(), chunk_size=2**16):
+        """Create a set of experiments from rows of settings.
+
+        **Arguments:**
+
+        - *rows*: Iterable of tuples of the model name, the parameter values
+          (in the order of *names*), and the command arguments (in the order
+          of *arg_names*)
+
+             The rows are read in chunks, so this may be a generator (e.g.,
+             from :mod:`modelicares.doe`).
+
+        - *names*: List of the names of the parameters
+
+        - *arg_names*: List of the keywords of the command arguments
+
+        - *chunk_size*: Number of rows to read at once
+        """
+        from itertools import islice
+
+        n_columns = 1 + len(names) + len(arg_names)
+        chunks = [[] for i in range(n_columns)]
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            for parts, values in zip(chunks, zip(*chunk)):
+                parts.append(_column(values))
+        columns = [_concatenate(parts) if parts else np.array([])
+                   for parts in chunks]
+        i_args = 1 + len(names)
+        return cls(columns[0], zip(names, columns[1:i_args]),
+                   zip(arg_names, columns[i_args:]))
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("The index of the experiment is out of range.")
+        values = [column[i:i+1].tolist()[0] for column in self.columns]
+        args = [column[i:i+1].tolist()[0] for column in self.arg_columns]
+        return self._experiment(self.models[self._model_index[i]], values,
+                                args)
+
+    def __iter__(self):
+        for start in range(0, len(self), self.BLOCK_SIZE):
+            stop = start + self.BLOCK_SIZE
+            block = [column[start:stop].tolist()
+                     for column in self.columns + self.arg_columns]
+            models = self._model_index[start:stop].tolist()
+            rows = zip(*block) if block else [()]*len(models)
+            for i_model, row in zip(models, rows):
+                yield self._experiment(self.models[i_model],
+                                       row[:len(self.names)],
+                                       row[len(self.names):])
+
+    def __len__(self):
+        return len(self._model_index)
+
+    def __repr__(self):
+        return ("<%s of %i experiments with %i parameters>"
+                % (self.__class__.__name__, len(self), len(self.names)))
+
+    def _experiment(self, model, values, args):
+        """Return an experiment from the values of its parameters and
+        arguments.
+        """
+        return Experiment(model=model,
+                          params=ParamRow(self.names, tuple(values),
+                                          self._modifiers),
+                          args=dict(zip(self.arg_names, args)))
+
+
+def _column(values):
+    """Return a list of values as a 1-D NumPy array.
+
+    Values that are arrays themselves or that differ in type (e.g., integers
+    and floats) are stored as objects, so that they aren't converted.
+    """
+    if isinstance(values, np.ndarray) and values.ndim == 1:
+        return values
+    column = np.asarray(values)
+    if column.ndim != 1 or len(set(type(value) for value in values)) > 1:
+        column = np.empty(len(values), dtype=object)
+        for i, value in enumerate(values):
+            column[i] = value
+    return column
+
+
+def _concatenate(columns):
+    """Concatenate columns from :meth:`_column`.
+
+    If the kinds of the values differ between the columns (e.g., integers and
+    floats), then the values are stored as objects.
+    """
+    if len(set(column.dtype.kind for column in columns)) > 1:
+        columns = [column.astype(object) for column in columns]
+    return np.concatenate(columns)
+
+
+def gen_experiments(models=None, params={}, args={}, design=doe.fullfact,
+                    compact=False):
     """Return a generator for a set of simulation experiments using permutation
     or simple element-wise grouping.
 
@@ -93,7 +284,17 @@ def gen_experiments(models=None, params={}, args={}, design=doe.fullfact):
 
          This is a function that returns a iterable object that contains or
          generates the simulation settings.  Several options are available in
-         :mod:`modelicares.doe`.
+         :mod:`modelicares.doe`.  If the design is adaptive (see
+         :meth:`doe.adaptive`), then the generator yields lists of experiments
+         and the results of each list must be sent back to it.
+
+    - *compact*: *True* to return the experiments as an
+      :class:`ExperimentSet` instead of a generator
+
+         The set stores the values of the parameters in arrays, which is much
+         more efficient for large designs.  The parameters of each experiment
+         are a :class:`ParamRow` rather than a :class:`ParamDict`.  This isn't
+         available for adaptive designs.
 
     **Example 1 (element-wise list of experiments):**
 
@@ -178,6 +379,21 @@ def gen_experiments(models=None, params={}, args={}, design=doe.fullfact):
        {'axis.motor.Ra.R': 300, 'axis.motor.i_max': 15}
        >>> # Also note that Python dictionaries do not preserve order (and it
        >>> # is not necessary here).
+
+    **Example 5 (compact set of experiments):**
+
+    .. code-block:: python
+
+       >>> from modelicares import *
+
+       >>> experiments = gen_experiments(
+       ...                  ['Modelica.Electrical.Analog.Examples.ChuaCircuit'],
+       ...                  {'L.L': [16, 18, 20], 'C2.C': [80, 100, 120]},
+       ...                  compact=True)
+       >>> experiments # doctest: +ELLIPSIS
+       <ExperimentSet of 9 experiments with 2 parameters>
+       >>> print(experiments[4].params)
+       (L(L=18), C2(C=100))
     """
     params = base.flatten_dict(params)
     i_args = len(params) + 1
@@ -186,12 +402,29 @@ def gen_experiments(models=None, params={}, args={}, design=doe.fullfact):
                              params=ParamDict(zip(params.keys(), x[1:i_args])),
                              args=dict(zip(args.keys(), x[i_args:])))
     try:
-        return (experiment(x) for x in
-                    design(*([models] + params.values() + args.values())))
+        settings = design(*([models] + params.values() + args.values()))
+        if compact:
+            assert not getattr(design, 'batches', False), (
+                "A compact set of experiments isn't available for an adaptive "
+                "design.")
+            return ExperimentSet.from_rows(settings, params.keys(),
+                                           args.keys())
+        if getattr(design, 'batches', False):
+            return _gen_batches(settings, experiment)
+        return (experiment(x) for x in settings)
     except TypeError:
         print("Error in call to gen_experiments(): models and all of the "
               "entries in params and args must be lists.")
 
+def _gen_batches(settings, experiment):
+    """Return a generator of batches of experiments from an adaptive design
+    (e.g., :meth:`doe.adaptive`) that forwards the results sent to it.
+    """
+    results = None
+    while True:
+        batch = settings.send(results)
+        results = yield [experiment(x) for x in batch]
+
 def modelica_array(x):
     """Return a string representing a NumPy_ array in Modelica_ format.
 
@@ -243,6 +476,250 @@ def modelica_boolean(x):
     return 'true' if x else 'false'
 
 
+def perf_report(runs, n_slowest=5, storm_factor=10):
+    """Summarize the performance of a set of simulations from their logs
+    ("dslog.txt").
+
+    **Arguments:**
+
+    - *runs*: Name of a manifest of :meth:`write_script` (e.g.,
+      "run-sims.json") or list of pairs of parameter dictionaries and names of
+      log files
+
+         The logs of the experiments in a manifest are read from their result
+         folders.  Runs without a log are skipped.  In a list, the runs are
+         numbered from 1.
+
+    - *n_slowest*: Number of the slowest runs to list
+
+    - *storm_factor*: Number of events (time, state, and step events) relative
+      to the median number among the runs (or 1, whichever is greater) above
+      which a run is considered an event storm
+
+    **Returns:** An instance of :class:`PerfReport`
+
+    The correlations indicate which parameters affect the cost.  They are
+    computed between the value of each numeric parameter that varies among the
+    runs and the logarithm of the CPU time, so that a parameter that makes the
+    model 100 times slower stands out.  Printing the report gives a summary.
+
+    **Example:**
+
+    .. code-block:: python
+
+       >>> from modelicares import *
+
+       >>> report = perf_report([({'L.L': 18}, 'examples/dslog.txt')])
+       >>> report.slowest
+       [1]
+       >>> print(report) # doctest: +NORMALIZE_WHITESPACE
+       1 run(s), 0.221 s of CPU time, 0 failed
+       <BLANKLINE>
+       Slowest runs:
+          run  CPU time (s)  steps/s  events  method
+            1         0.221    15493       4  DASSL
+
+    For the runs of a script from :meth:`write_script`:
+
+    .. code-block:: python
+
+       >>> print(perf_report('examples/ChuaCircuit/run-sims.json')) # doctest: +SKIP
+    """
+    # Read the logs.
+    if isinstance(runs, basestring):
+        with open(base.expand_path(runs)) as manifest:
+            runs = [(entry['number'], entry['params'],
+                     os.path.join(entry['results'], 'dslog.txt'))
+                    for entry in json.load(manifest)['experiments']]
+    else:
+        runs = [(number, params, fname)
+                for number, (params, fname) in zip(count(1), runs)]
+    records = []
+    for number, params, fname in runs:
+        try:
+            records.append((number, base.flatten_dict(params),
+                            read_dslog(fname)))
+        except IOError:
+            continue
+
+    # Rank the runs.
+    timed = [(number, log.cpu_time) for number, params, log in records
+             if log.cpu_time is not None]
+    slowest = [number for number, cpu_time
+               in sorted(timed, key=lambda run: -run[1])[:n_slowest]]
+    events = dict((number, _n_events(log)) for number, params, log in records)
+    threshold = storm_factor*max(np.median(events.values())
+                                 if events else 0, 1)
+    storms = [number for number, params, log in records
+              if events[number] > threshold]
+
+    # Correlate the cost with the parameters.
+    correlations = {}
+    if len(timed) > 1:
+        numbers = set(number for number, cpu_time in timed)
+        cost = np.log10(np.maximum([cpu_time for number, cpu_time in timed],
+                                   1e-6))
+        rows = [params for number, params, log in records
+                if number in numbers]
+        for name in set().union(*rows):
+            try:
+                values = np.array([row[name] for row in rows], dtype=float)
+            except (KeyError, TypeError, ValueError):
+                continue # Missing or not numeric
+            if np.ptp(values) > 0 and np.ptp(cost) > 0:
+                correlations[name] = np.corrcoef(values, cost)[0, 1]
+    return PerfReport(records, slowest, storms, correlations)
+
+
+class PerfReport(namedtuple('PerfReport', ['runs', 'slowest', 'storms',
+                                           'correlations'])):
+    """Named tuple class for the summary of :meth:`perf_report`
+
+    *runs* is a list of tuples of the run number, the flattened parameter
+    dictionary, and the log information (:class:`DslogInfo`).  *slowest* is a
+    list of the numbers of the slowest runs (slowest first) and *storms* is a
+    list of the numbers of the runs with event storms.  *correlations* is a
+    dictionary of the correlation coefficients between the parameters and the
+    logarithm of the CPU time, by parameter name.
+
+    The string representation is a readable summary.
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        logs = dict((number, log) for number, params, log in self.runs)
+        total = sum(log.cpu_time for log in logs.values()
+                    if log.cpu_time is not None)
+        n_failed = sum(1 for log in logs.values() if not log.successful)
+        lines = ["%i run(s), %.3g s of CPU time, %i failed"
+                 % (len(logs), total, n_failed)]
+
+        def _table(title, numbers):
+            """Add a table of runs."""
+            lines.extend(['', title + ':',
+                          '   run  CPU time (s)  steps/s  events  method'])
+            for number in numbers:
+                log = logs[number]
+                rate = (log.n_steps/log.cpu_time
+                        if log.n_steps and log.cpu_time else float('nan'))
+                lines.append('%6i  %12.4g  %7.0f  %6i  %s'
+                             % (number, log.cpu_time or float('nan'), rate,
+                                _n_events(log), log.method or ''))
+
+        if self.slowest:
+            _table("Slowest runs", self.slowest)
+        if self.storms:
+            _table("Event storms", self.storms)
+        if self.correlations:
+            lines.extend(['', "Correlation of log(CPU time) with parameters:"])
+            for name, r in sorted(self.correlations.items(),
+                                  key=lambda item: -abs(item[1])):
+                lines.append('   %+.2f  %s' % (r, name))
+        return '\n'.join(lines)
+
+
+DslogInfo = namedtuple('DslogInfo', ['method', 'start_time', 'stop_time',
+                                     'successful', 'cpu_time',
+                                     'cpu_time_per_interval',
+                                     'n_result_points', 'n_grid_points',
+                                     'n_steps', 'n_f_evals', 'n_h_evals',
+                                     'n_jacobians', 'n_time_events',
+                                     'n_u_time_events', 'n_state_events',
+                                     'n_step_events', 'min_step', 'max_step',
+                                     'max_order'])
+"""Named tuple class for the information in a simulation log (see
+:meth:`read_dslog`)
+
+*method* is the name of the integration method, *start_time* is the time at
+which the integration started, and *stop_time* is the time at which it
+terminated.  *successful* is *True* if the integration terminated
+successfully.  The CPU times are in seconds.  The other fields are the
+statistics at the end of the log (numbers of steps, evaluations of the model
+functions and Jacobians, events, and the range of step sizes).  Fields that
+aren't in the log are *None*.
+"""
+
+_DSLOG_FIELDS = {'CPU-time for integration': 'cpu_time',
+                 'CPU-time for one GRID interval': 'cpu_time_per_interval',
+                 'Number of result points': 'n_result_points',
+                 'Number of GRID points': 'n_grid_points',
+                 'Number of (successful) steps': 'n_steps',
+                 'Number of F-evaluations': 'n_f_evals',
+                 'Number of H-evaluations': 'n_h_evals',
+                 'Number of Jacobian-evaluations': 'n_jacobians',
+                 'Number of (model) time events': 'n_time_events',
+                 'Number of (U) time events': 'n_u_time_events',
+                 'Number of state events': 'n_state_events',
+                 'Number of step events': 'n_step_events',
+                 'Minimum integration stepsize': 'min_step',
+                 'Maximum integration stepsize': 'max_step',
+                 'Maximum integration order': 'max_order'}
+# Fields of DslogInfo by the labels of the statistics in the log
+
+
+def read_dslog(fname='dslog.txt'):
+    """Read the information from a simulation log of Dymola\ :sup:`®`.
+
+    **Arguments:**
+
+    - *fname*: Name of the log file (may include the file path)
+
+    **Returns:** An instance of :class:`DslogInfo`
+
+    If the log has the statistics of several integrations (e.g., after
+    restarts), the last ones are used.
+
+    **Example:**
+
+    .. code-block:: python
+
+       >>> from modelicares import *
+
+       >>> log = read_dslog('examples/dslog.txt')
+       >>> log.method, log.successful, log.stop_time
+       ('DASSL', True, 2500.0)
+       >>> log.cpu_time, log.n_steps, log.n_state_events
+       (0.221, 3424, 4)
+    """
+    info = dict.fromkeys(DslogInfo._fields)
+    info['successful'] = False
+    with open(base.expand_path(fname)) as log:
+        for line in log:
+            match = re.match(r'Integration started at T = (\S+)'
+                             r'(?: using integration method (\S+))?', line)
+            if match:
+                info['start_time'] = float(match.group(1))
+                info['method'] = match.group(2)
+                continue
+            match = re.match(r'Integration terminated (.*)at T = (\S+)', line)
+            if match:
+                info['successful'] = match.group(1).startswith('successfully')
+                info['stop_time'] = float(match.group(2))
+                continue
+            label, colon, value = line.partition(':')
+            field = _DSLOG_FIELDS.get(' '.join(label.split()))
+            if field and value.split():
+                number = value.split()[0]
+                try:
+                    info[field] = int(number)
+                except ValueError:
+                    try:
+                        info[field] = float(number)
+                    except ValueError:
+                        continue
+                if 'milli-seconds' in value:
+                    info[field] *= 1e-3
+    return DslogInfo(**info)
+
+
+def _n_events(log):
+    """Return the total number of events in the log information of a
+    simulation (:class:`DslogInfo`).
+    """
+    return sum(n or 0 for n in [log.n_time_events, log.n_u_time_events,
+                                log.n_state_events, log.n_step_events])
+
+
 def read_params(names, fname='dsin.txt'):
     """Read parameter values from an initialization or final values file.
 
@@ -256,6 +733,9 @@ def read_params(names, fname='dsin.txt'):
 
     - *fname*: Name of the file (may include the file path)
 
+    The file is parsed by :class:`DsinFile`.  To read or set parameters of the
+    same file several times, use that class directly.
+
     **Example:**
 
     .. code-block:: python
@@ -265,81 +745,23 @@ def read_params(names, fname='dsin.txt'):
        >>> read_params(['L.L', 'C1.C'], 'examples/dsin.txt')
        [18.0, 10.0]
     """
-    # Aliases for some regular subexpressions
-    f = '[+-]?\d+(?:\.\d+)?(?:[Ee][+-]\d+)?' # Floating point number
-    i = '[+-]?\d+' # Integer
-    u = '\d+' # Unsigned integer
-
-    # Possible regular expressions for a parameter specification (with '%s' for
-    # the parameter name)
-    patterns = [# Dymola 1- or 2-line parameter specification
-                (r'^ *%s +(%s) +%s +%s *\n? +%s +%s +# +%s *$'
-                 % (i, f, f, f, u, u, '%s')),
-                # From Dymola:
-                # column 1: Type of initial value
-                #           = -2: special case: for continuing simulation
-                #                               (column 2 = value)
-                #           = -1: fixed value   (column 2 = fixed value)
-                #           =  0: free value, i.e., no restriction
-                #                               (column 2 = initial value)
-                #           >  0: desired value (column 1 = weight for
-                #                                           optimization
-                #                                column 2 = desired value)
-                #                 use weight=1, since automatic scaling usually
-                #                 leads to equally weighted terms
-                # column 2: fixed, free or desired value according to column 1.
-                # column 3: Minimum value (ignored, if Minimum >= Maximum).
-                # column 4: Maximum value (ignored, if Minimum >= Maximum).
-                #           Minimum and maximum restrict the search range in
-                #           initial value calculation. They might also be used
-                #           for scaling.
-                # column 5: Category of variable.
-                #           = 1: parameter.
-                #           = 2: state.
-                #           = 3: state derivative.
-                #           = 4: output.
-                #           = 5: input.
-                #           = 6: baseiliary variable.
-                # column 6: Data type of variable.
-                #           = 0: real.
-                #           = 1: boolean.
-                #           = 2: integer.
-               ]
-    # These are tried in order until there is a match.  The group or pair of
-    # parentheses contains the parameter value.
-
-    # Read the file.
-    src = open(fname, 'r')
-    text = src.read()
-    src.close()
-
-    # Read the parameters.
-    def _read_param(name):
-        """Read a single parameter"""
-        namere = name.replace('.', '\.') # Escape the dots.
-        for pattern in patterns:
-            try:
-                return float(re.search(pattern % namere, text,
-                             re.MULTILINE).group(1))
-            except AttributeError:
-                pass # Try the next pattern.
-        else:
-            raise AssertionError(
-                "Parameter %s does not exist or is not formatted as expected "
-                "in %s." % (name, fname))
-
-    if isinstance(names, basestring):
-        return _read_param(names)
-    else:
-        return [_read_param(name) for name in names]
+    return DsinFile(fname).get(names)
 
 
 def run_models(experiments=[(None, {}, {})],
                filemap = {'dslog.txt': '%s_%i.log',
-                          'dsres.mat': '%s_%i.mat'}):
+                          'dsres.mat': '%s_%i.mat'},
+               workers=None, timeout=None, scratch_dir=None, keep=False,
+               cache=None, journal=None):
     """Run Modelica_ models via pairs of executables and initialization files.
 
-    .. Warning:: This function has not yet been implemented.
+    Each experiment is run in its own scratch directory, so several may run at
+    once.  The executable is hard-linked (or copied) into the directory and
+    the initialization file is written there as "dsin.txt" with the
+    parameters and settings of the experiment.  The initialization file is
+    parsed only once per model (see :class:`DsinTemplate`).  Once the
+    executable exits, the files in *filemap* are moved out of the directory
+    and the directory is removed.
 
     **Arguments**:
 
@@ -371,6 +793,13 @@ def run_models(experiments=[(None, {}, {})],
          be given as their unsigned integer equivalents (e.g., 0 for *False*).
          Strings and prefixes are not supported.
 
+         The keywords in *args* are the same as for the *simulateModel*
+         command in :meth:`write_script` (*startTime*, *stopTime*,
+         *numberOfIntervals*, *outputInterval*, *method*, *tolerance*, and
+         *fixedstepsize*).  They are written to the experiment section of the
+         initialization file.  *method* may be the name of the integration
+         algorithm (e.g., 'Dassl') or its number in the initialization file.
+
          Items with values of *None* in *params* and *args* are skipped.
 
     - *filemap*: Dictionary of result file mappings
@@ -383,37 +812,338 @@ def run_models(experiments=[(None, {}, {})],
           full path or extension.  '%i' may be included to indicate the
           simulation number in the sequence of experiments.
 
-    There are no return values.
-    """
-    raise NotImplementedError("run_models() has not yet been implemented.")
-    """
-    **Examples:**
-import os
+          The standard output and error of the executable are written to
+          "dsout.txt", which may be mapped as well.
+
+    - *workers*: Maximum number of simulations to run at once (*None* for the
+      number of CPUs)
+
+    - *timeout*: Maximum time (in seconds) for a simulation (*None* for no
+      limit)
+
+         The executable is killed if it runs longer.
+
+    - *scratch_dir*: Directory in which to create the scratch directories
+
+         By default, they are created in the directory of the executable.
+
+    - *keep*: *True*, if the scratch directories should be kept (e.g., for
+      debugging)
+
+    - *cache*: Cache of results (:class:`RunCache`) or *None*
+
+         If it is given, each experiment is looked up by its model name,
+         parameters, settings, and the contents of the executable and the
+         initialization file.  If the results are cached, then the cached
+         files are linked to the destinations in *filemap* instead of running
+         the executable.  Otherwise, the result files of a successful run are
+         added to the cache.
+
+    - *journal*: Journal of the states of the experiments (:class:`Journal`)
+      or *None*
+
+         If it is given, the experiments that are already done according to
+         the journal are skipped (with the status 'done').  The others are
+         recorded as 'queued', 'running', and finally 'done' or 'failed' along
+         with the result files and run time.  After an interruption, run the
+         same experiments with the same journal to resume the sweep.
+
+    **Returns:** List of the results of the experiments (instances of
+    :class:`RunStatus`), in the order of the experiments
+
+    **Example:**
+
+    .. code-block:: python
+
+       >>> from modelicares import *
+
+       >>> experiments = gen_experiments(
+       ...     models=['examples/ChuaCircuit/ChuaCircuit'],
+       ...     params={'L.L': [16, 18, 20]},
+       ...     args={'stopTime': [2500]})
+       >>> for run in run_models(experiments, workers=3): # doctest: +SKIP
+       ...     print("%i: %s in %.1f s" % (run.number, run.status, run.elapsed))
+       1: ok in 0.6 s
+       2: ok in 0.6 s
+       3: ok in 0.7 s
+
+    The results are "examples/ChuaCircuit/ChuaCircuit_1.mat" through
+    "examples/ChuaCircuit/ChuaCircuit_3.mat" (with the corresponding log
+    files).  With a cache, only the new points of a sweep are run:
 
-from itertools import count, product
+    .. code-block:: python
+
+       >>> cache = RunCache('~/.modelicares/runs', max_bytes=2**30) # doctest: +SKIP
+       >>> experiments = gen_experiments(
+       ...     models=['examples/ChuaCircuit/ChuaCircuit'],
+       ...     params={'L.L': [18, 20, 22]},
+       ...     args={'stopTime': [2500]})
+       >>> for run in run_models(experiments, cache=cache): # doctest: +SKIP
+       ...     print("%i: %s" % (run.number, run.status))
+       1: ok
+       2: cached
+       3: ok
+
+    A long sweep can be resumed if it is run with a journal:
+
+    .. code-block:: python
+
+       >>> journal = Journal('examples/ChuaCircuit/sweep.jsonl') # doctest: +SKIP
+       >>> runs = run_models(experiments, journal=journal) # doctest: +SKIP
 
-from modelicares import *
+    Any executable with the same command-line arguments as Dymosim may be run.
+    Here, a stub copies the initialization file to the result file:
+
+    .. code-block:: python
+
+       >>> import os, shutil, sys
+       >>> from tempfile import mkdtemp
+
+       >>> directory = mkdtemp()
+       >>> model = os.path.join(directory, 'stub')
+       >>> shutil.copy('examples/dsin.txt', model + '.in')
+       >>> with open(model, 'w') as f:
+       ...     f.write("#!%s\\n" % sys.executable)
+       ...     f.write("import shutil, sys\\n")
+       ...     f.write("shutil.copy(sys.argv[1], sys.argv[2])\\n")
+       >>> os.chmod(model, 0755)
+       >>> experiments = list(gen_experiments(models=[model],
+       ...                                    params={'L.L': [16, 20]},
+       ...                                    args={'stopTime': [10]}))
+       >>> cache = RunCache(os.path.join(directory, 'cache'))
+       >>> [run.status for run in run_models(experiments, cache=cache)]
+       ['ok', 'ok']
+       >>> read_params(['L.L', 'StopTime'], os.path.join(directory, 'stub_2.mat'))
+       [20.0, 10.0]
+       >>> [run.status for run in run_models(experiments, cache=cache)]
+       ['cached', 'cached']
+
+    .. testcleanup::
+       >>> shutil.rmtree(directory)
+    """
+    from itertools import islice
+    from multiprocessing import cpu_count
+    from multiprocessing.pool import ThreadPool
+    from threading import Lock, Semaphore
 
-model = 'Modelica.Mechanics.MultiBody.Examples.Systems.RobotR3.oneAxis'
-params = {'axis.motor.i_max': [5, 9, 15],
-          'axis.motor.Ra.R': [200, 250, 300]}
-params = {'axis.motor.i_max': 9,
-          'axis.motor.Ra.R': 250}
-params = {'L.L': [18, 20],
-          'C1.C': [8, 10],
-          'C2.C': [80, 100, 120]}
+    # Preprocess the arguments.
+    if not isinstance(experiments, (list, GeneratorType, ExperimentSet)):
+        experiments = [experiments]
+    if workers is None:
+        workers = cpu_count()
+
+    # The initialization files are written from templates (DsinTemplate),
+    # which are created once per model and set of parameter names.
+    templates = {}
+    lock = Lock()
+
+    def _template(fname, names):
+        """Return the template for an initialization file and parameters."""
+        key = (fname, tuple(sorted(names)))
+        with lock:
+            if key not in templates:
+                templates[key] = DsinTemplate(fname, key[1])
+            return templates[key]
+
+    # The experiments are read only as the workers become free, so that a
+    # large set (or a generator) isn't held in memory at once.  Those that
+    # aren't done according to the journal are queued there block by block.
+    # Errors in reading the experiments are passed back to this thread.
+    block_size = 4*workers
+    slots = Semaphore(block_size)
+    stopped = []
+    errors = []
+    if journal is not None:
+        done = dict((key, record) for key, record in journal.states().items()
+                    if record['state'] == 'done')
+
+    def _jobs():
+        """Generate the jobs (number, experiment, and journal key)."""
+        numbered = izip(count(1), experiments)
+        while True:
+            try:
+                block = [(i, experiment, journal.key(*experiment)
+                          if journal is not None else None)
+                         for i, experiment in islice(numbered, block_size)]
+                if journal is not None:
+                    journal._append([dict(key=key, state='queued', number=i,
+                                          model=experiment[0])
+                                     for i, experiment, key in block
+                                     if key not in done])
+            except Exception:
+                errors.append(sys.exc_info())
+                return
+            if not block:
+                return
+            for job in block:
+                slots.acquire()
+                if stopped:
+                    return
+                yield job
+
+    def _run(job):
+        """Run an experiment and record its state in the journal."""
+        try:
+            return _run_job(*job)
+        finally:
+            slots.release()
+
+    def _run_job(i, experiment, key):
+        """Run an experiment (see :meth:`_run`)."""
+        if journal is None:
+            return _run_model(i, experiment, filemap, timeout, scratch_dir,
+                              keep, _template, cache)
+        if key in done:
+            record = done[key]
+            return RunStatus(number=i, model=experiment[0], status='done',
+                             returncode=0, elapsed=record.get('elapsed', 0),
+                             files=record.get('files', []))
+        journal.record(key, 'running', number=i)
+        run = _run_model(i, experiment, filemap, timeout, scratch_dir, keep,
+                         _template, cache)
+        journal.record(key, 'done' if run.status in ['ok', 'cached']
+                       else 'failed', number=i, status=run.status,
+                       returncode=run.returncode, elapsed=run.elapsed,
+                       files=run.files)
+        return run
+
+    # The processes are run by threads since the threads only wait for them.
+    pool = ThreadPool(workers)
+    try:
+        runs = list(pool.imap(_run, _jobs(), chunksize=1))
+        if errors:
+            exc_type, exc_value, traceback = errors[0]
+            raise exc_type, exc_value, traceback
+        return runs
+    except:
+        # Stop reading the experiments.
+        stopped.append(True)
+        slots.release()
+        raise
+    finally:
+        pool.close()
+        pool.join()
+
+
+RunStatus = namedtuple('RunStatus', ['number', 'model', 'status',
+                                     'returncode', 'elapsed', 'files'])
+"""Named tuple class for the result of an experiment in :meth:`run_models`
+
+*number* is the number of the experiment (1-based), *model* is the model
+executable, and *status* is 'ok', 'failed' (nonzero exit code), 'timeout',
+'error' (the experiment could not be started), 'cached' (the results were
+taken from a :class:`RunCache`), or 'done' (the experiment was done before
+according to a :class:`Journal`).  *returncode* is the exit code
+of the executable (*None* if it did not exit), *elapsed* is the run time in
+seconds, and *files* is a list of the result files that were created.
+"""
 
+SIM_ARGS = {'startTime': 'StartTime', 'stopTime': 'StopTime',
+            'outputInterval': 'Increment', 'numberOfIntervals': 'nInterval',
+            'tolerance': 'Tolerance', 'fixedstepsize': 'MaxFixedStep',
+            'method': 'Algorithm'}
+"""Names of the simulation settings in the initialization file, by keyword of
+the *simulateModel* command"""
 
-doe = gen_doe(params)
-for e in doe:
-   print(str(e) + ' or ' + modifier(e))
+ALGORITHMS = ['deabm', 'lsode1', 'lsode2', 'lsodar', 'dopri5', 'dopri8',
+              'grk4t', 'dassl', 'odassl', 'mexx', 'euler', 'rkfix2', 'rkfix3',
+              'rkfix4']
+"""Integration algorithms of Dymosim (numbered from 1)"""
 
-params.items()
 
-simspecs = [SimSpec(model + "(L(L=%s), C1(C=%s), C2(C=%s))" % params,
-            resultFile="ChuaCircuit%i" % i)
-            for i, params in zip(count(1), product(Ls, C1s, C2s))]
+def _run_model(i, experiment, filemap, timeout, scratch_dir, keep, template,
+               cache=None):
+    """Run a single experiment for :meth:`run_models` and return an instance
+    of :class:`RunStatus`.
     """
+    import subprocess
+    import time
+    from tempfile import mkdtemp
+
+    model, params, args = experiment
+    assert model, "The model executable must be given."
+    model = base.expand_path(model)
+    model_dir, name = os.path.split(model)
+    name = os.path.splitext(name)[0]
+    if os.name == 'nt' and not model.endswith('.exe'):
+        model += '.exe'
+    destinations = dict((src, os.path.join(model_dir,
+                                           dst.replace('%s', name)
+                                              .replace('%i', str(i))))
+                        for src, dst in filemap.items())
+
+    # Look up the results in the cache.
+    key = None
+    if cache is not None:
+        key = cache.key(name, params, args,
+                        sources=[model, os.path.splitext(model)[0] + '.in'])
+        files = cache.fetch(key, destinations)
+        if files is not None:
+            return RunStatus(number=i, model=model, status='cached',
+                             returncode=0, elapsed=0, files=files)
+
+    elapsed = 0
+    returncode = None
+    files = []
+    work_dir = None
+    try:
+        # Set up the scratch directory.
+        work_dir = mkdtemp(prefix='%s_%i-' % (name, i),
+                           dir=scratch_dir or model_dir or None)
+        exe = os.path.join(work_dir, os.path.basename(model))
+        _link(model, exe)
+        values = dict(item for item in base.flatten_dict(params).items()
+                      if item[1] is not None)
+        for arg, value in args.items():
+            if value is None:
+                continue
+            if arg == 'method' and isinstance(value, basestring):
+                value = ALGORITHMS.index(value.strip('"').lower()) + 1
+            values[SIM_ARGS[arg]] = value
+        template(os.path.splitext(model)[0] + '.in',
+                 values.keys()).write(os.path.join(work_dir, 'dsin.txt'),
+                                      values)
+
+        # Run the executable.
+        with open(os.path.join(work_dir, 'dsout.txt'), 'w') as output:
+            start = time.time()
+            process = subprocess.Popen([exe, 'dsin.txt', 'dsres.mat'],
+                                       cwd=work_dir, stdout=output,
+                                       stderr=subprocess.STDOUT)
+            while process.poll() is None:
+                if timeout is not None and time.time() - start > timeout:
+                    process.kill()
+                    process.wait()
+                    break
+                time.sleep(0.05)
+            else:
+                returncode = process.returncode
+            elapsed = time.time() - start
+        if returncode is None:
+            status = 'timeout'
+        else:
+            status = 'ok' if returncode == 0 else 'failed'
+
+        # Map the result files.
+        moved = {}
+        for src, dst in destinations.items():
+            if os.path.isfile(os.path.join(work_dir, src)):
+                if os.path.dirname(dst) and not os.path.isdir(
+                    os.path.dirname(dst)):
+                    os.makedirs(os.path.dirname(dst))
+                shutil.move(os.path.join(work_dir, src), dst)
+                moved[src] = dst
+        files = sorted(moved.values())
+        if key is not None and status == 'ok':
+            cache.put(key, moved)
+    except Exception as error:
+        print("Experiment %i (%s) could not be run: %s" % (i, model, error))
+        status = 'error'
+    finally:
+        if work_dir and not keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return RunStatus(number=i, model=model, status=status,
+                     returncode=returncode, elapsed=elapsed, files=files)
 
 
 def write_params(params, fname='dsin.txt'):
@@ -435,6 +1165,9 @@ def write_params(params, fname='dsin.txt'):
 
     - *fname*: Name of the file (may include the file path)
 
+    The file is parsed by :class:`DsinFile`.  To read or set parameters of the
+    same file several times, use that class directly.
+
     **Example:**
 
     .. code-block:: python
@@ -454,63 +1187,17 @@ def write_params(params, fname='dsin.txt'):
        ...
        -1      15                  0  1.000000000000000E+100  1  280   # C1.C
     """
-    # Pre-process the values.
-    for key, value in params.items():
-        if isinstance(value, bool):
-            params[key] = 1 if value else 0
-        assert not isinstance(value, np.ndarray), ("Arrays must be split "
-            "into scalars for the simulation initialization file.")
-        assert not isinstance(value, basestring), ("Strings cannot be "
-            "used as values in the simulation initialization file.")
-
-    # Aliases for some regular subexpressions
-    f = '[+-]?\d+(?:\.\d+)?(?:[Ee][+-]\d+)?' # Floating point number
-    i = '[+-]?\d+' # Integer
-    u = '\d+' # Unsigned integer
-
-    # Possible regular expressions for a parameter specification (with '%s' for
-    # the parameter name)
-    patterns = [# Dymola 1- or 2-line parameter specification
-                (r'(^ *%s *) %s ( *%s +%s *\n? +%s +%s +# +%s *)$'
-                 % (i, f, f, f, u, u, '%s')),
-                (r'(^ *) %s ( *# *%s *)' % (i, '%s')),
-                (r'(^ *) %s ( *# *%s *)' % (f, '%s')),
-                # See read_params() for descriptions of the columns.
-               ]
-    # These are tried in order until there is a match.  The first group or pair
-    # of parentheses contains the text before the parameter value and the
-    # second contains the text after it (minus one space on both sides for
-    # clarity).
-
-    # Read the file.
-    src = open(fname, 'r')
-    text = src.read()
-    src.close()
-
-    # Set the parameters.
-    for name, value in params.items():
-        namere = name.replace('.', '\.') # Escape the dots.
-        for pattern in patterns:
-            text, n = re.subn(pattern % namere, r'\1 %s \2' % value, text, 1,
-                              re.MULTILINE)
-            if n == 1:
-                break
-        else:
-            raise AssertionError(
-                "Parameter %s does not exist or is not formatted as expected "
-                "in %s." % (name, fname))
-
-    # Re-write the file.
-    src = open(fname, 'w')
-    src.write(text)
-    src.close()
+    dsin = DsinFile(fname)
+    dsin.update(params)
+    dsin.write()
 
 
 def write_script(experiments=[(None, {}, {})], packages=[],
                  working_dir="~/Documents/Modelica", fname="run-sims.mos",
                  command='simulateModel',
                  results=['dsin.txt', 'dslog.txt', 'dsres.mat', 'dymosim%x',
-                          'dymolalg.txt']):
+                          'dymolalg.txt'], n_shards=None, costs=None,
+                 cache=None, journal=None):
     """Write a Modelica_ script to run simulations.
 
     **Arguments**:
@@ -579,6 +1266,54 @@ def write_script(experiments=[(None, {}, {})], packages=[],
          the number of the simulation run and placed within the folder that
          contains the simulation script (*fname*).
 
+    - *n_shards*: Number of scripts to split the experiments into (*None* for
+      one script)
+
+         The scripts can be run at once by separate instances of the Modelica_
+         environment.  They are named by appending "-1", "-2", etc. to the
+         base of *fname*, and each uses a subdirectory of *working_dir* with
+         the same suffix.  The experiments are balanced among the scripts by
+         their estimated costs (longest first, to the script with the least
+         total cost).  The results are stored in the same folders as without
+         shards, so they can be collected in the order of the experiments.  A
+         manifest of the experiments and scripts is written to a JSON file
+         with the base of *fname* (e.g., "run-sims.json").
+
+    - *costs*: Estimated cost (e.g., CPU time) of the experiments for
+      balancing the shards
+
+         This may be a function that takes an experiment and returns its cost,
+         a dictionary of costs by model name, or *None*.  If it is *None*, then
+         the CPU times are read from the logs ("dslog.txt") of previous runs
+         listed in the manifest, if available.  An experiment that has been
+         run before (with the same model, parameters, and arguments) is
+         estimated by its own CPU time and any other experiment by the average
+         time of its model.  The cost of a model that hasn't been run is the
+         average of the known costs (or 1).
+
+    - *cache*: Cache of results (:class:`RunCache`) or *None*
+
+         If it is given, each experiment is looked up by its model name,
+         parameters, arguments, and the contents of the files in *packages*.
+         The results of cached experiments are linked into their result
+         folders and the experiments are left out of the script(s).  The
+         manifest (see *n_shards*) lists the key of each experiment and
+         whether it was cached.  Once the script(s) have been run, call
+         :meth:`RunCache.collect` with the manifest to add the new results to
+         the cache.
+
+    - *journal*: Journal of the states of the experiments (:class:`Journal`)
+      or *None*
+
+         If it is given, the experiments that are already done according to
+         the journal are left out of the script(s) and the others are
+         recorded as 'queued'.  The script(s) append records to the journal as
+         each experiment is started ('running') and finished ('done' or
+         'failed').  These records have no time since it isn't available in
+         the script.  If the simulations are interrupted, call this function
+         again with the same experiments and journal to write script(s) that
+         resume the sweep.
+
     If *command* is 'simulateModel' and the Modelica_ environment is
     Dymola\ :sup:`®`, then the following keywords may be used in *args*
     (see *experiments* above).  The defaults (shown in parentheses) are applied
@@ -665,18 +1400,173 @@ def write_script(experiments=[(None, {}, {})], packages=[],
 
     In "examples/ChuaCircuit/run-sims2.mos", there are commands to run and
     save results from 12 simulation experiments.
+
+    **Example 3 (full-factorial design in 4 shards):**
+
+    .. code-block:: python
+
+       >>> from modelicares import *
+
+       >>> experiments = gen_experiments(
+       ...     models=["Modelica.Electrical.Analog.Examples.ChuaCircuit"],
+       ...     params={'L.L': [18, 20],
+       ...             'C1.C': [8, 10],
+       ...             'C2.C': [80, 100, 120]})
+       >>> models, results_dir = write_script(experiments,
+       ...     fname="examples/ChuaCircuit/run-sims.mos", n_shards=4)
+
+    The experiments are split among "examples/ChuaCircuit/run-sims-1.mos"
+    through "examples/ChuaCircuit/run-sims-4.mos", and they are listed in
+    "examples/ChuaCircuit/run-sims.json".
     """
     # Preprocess the arguments.
-    if not isinstance(experiments, (list, GeneratorType)):
+    if not isinstance(experiments, (list, GeneratorType, ExperimentSet)):
         experiments = [experiments]
     fname = base.expand_path(fname)
 
     working_dir = base.expand_path(working_dir)
     results_dir = os.path.split(fname)[0]
+    if not os.path.isdir(results_dir):
+        os.makedirs(results_dir)
     exe = '.exe' if os.name == 'nt' else ''
-    for i, result in enumerate(results):
-        results[i] = result.replace('%x', exe)
+    results = [result.replace('%x', exe) for result in results]
+
+    # Without shards, a cache, or a journal, the experiments are written as
+    # they are generated.
+    experiments = izip(count(1), experiments)
+    if n_shards is None and cache is None and journal is None:
+        models = []
+
+        def _numbered():
+            """Yield the numbered experiments and collect the model names."""
+            for i, experiment in experiments:
+                models.append(experiment[0][experiment[0].rfind('.')+1:])
+                yield i, experiment
+
+        _write_mos(fname, _numbered(), packages, working_dir, results_dir,
+                   command, results)
+        return models, results_dir
+
+    # Number the experiments and look them up in the cache.
+    experiments = list(experiments)
+    models = [model[model.rfind('.')+1:] for i, (model, params, args)
+              in experiments]
+    keys = {}
+    cached = set()
+    pending = experiments
+    if cache is not None:
+        sources = [os.path.join(working_dir, package) for package in packages]
+        pending = []
+        for number, experiment in experiments:
+            keys[number] = cache.key(*experiment, sources=sources)
+            if cache.fetch(keys[number], os.path.join(results_dir,
+                                                      str(number))) is None:
+                pending.append((number, experiment))
+            else:
+                cached.add(number)
+    if journal is not None:
+        done = journal.done()
+        records = []
+        for number, experiment in experiments:
+            key = journal.key(*experiment)
+            if number in cached and key not in done:
+                records.append(dict(key=key, state='done', number=number,
+                                    results=os.path.join(results_dir,
+                                                         str(number)),
+                                    cached=True))
+                done.add(key)
+        journal._append(records)
+        pending = [(number, experiment) for number, experiment in pending
+                   if journal.key(*experiment) not in done]
+    # Assign the experiments to the scripts.
+    manifest_name = os.path.splitext(fname)[0] + '.json'
+    if n_shards is None:
+        estimates = [None]*len(pending)
+        shards = [range(len(pending))]
+    else:
+        estimates = _estimate_costs([experiment for i, experiment in pending],
+                                    costs, manifest_name)
+        shards = [[] for k in range(n_shards)]
+        loads = [(0, k) for k in range(n_shards)]
+        for cost, i in sorted(((cost, i) for i, cost in enumerate(estimates)),
+                              key=lambda entry: (-entry[0], entry[1])):
+            load, k = heapq.heappop(loads)
+            shards[k].append(i)
+            heapq.heappush(loads, (load + cost, k))
+
+    # Write the scripts and the manifest.
+    root, ext = os.path.splitext(fname)
+    scripts = []
+    entries = []
+    for k, shard in enumerate(shards):
+        if n_shards is None:
+            shard_number = None
+            script = fname
+            _write_mos(script, [pending[i] for i in shard], packages,
+                       working_dir, results_dir, command, results,
+                       journal=journal)
+        elif shard:
+            shard_number = k + 1
+            script = '%s-%i%s' % (root, shard_number, ext)
+            _write_mos(script, [pending[i] for i in sorted(shard)], packages,
+                       os.path.join(working_dir, str(shard_number)),
+                       results_dir, command, results, create_dir=True,
+                       journal=journal)
+        else:
+            continue
+        scripts.append(script)
+        for i in shard:
+            number, experiment = pending[i]
+            entries.append(_manifest_entry(number, experiment, results_dir,
+                                           shard=shard_number, script=script,
+                                           cost=estimates[i],
+                                           key=keys.get(number),
+                                           cached=False))
+    run = set(number for number, experiment in pending)
+    entries += [_manifest_entry(number, experiment, results_dir,
+                                key=keys.get(number), cached=number in cached)
+                for number, experiment in experiments if number not in run]
+    if journal is not None:
+        scripts_by_number = dict((entry['number'], entry['script'])
+                                 for entry in entries)
+        journal._append([dict(key=journal.key(*experiment), state='queued',
+                              number=number, model=experiment[0],
+                              script=scripts_by_number[number],
+                              results=os.path.join(results_dir, str(number)))
+                         for number, experiment in pending])
+    entries.sort(key=lambda entry: entry['number'])
+    with open(manifest_name, 'w') as manifest:
+        json.dump(dict(created=date.isoformat(date.today()),
+                       results_dir=results_dir, scripts=scripts,
+                       experiments=entries),
+                  manifest, indent=1, default=str)
+    return models, results_dir
+
+
+def _manifest_entry(number, experiment, results_dir, **kwargs):
+    """Return the entry of an experiment in the manifest of
+    :meth:`write_script`.
 
+    *kwargs* are the remaining fields of the entry.
+    """
+    model, params, args = experiment
+    entry = dict(shard=None, script=None, cost=None)
+    entry.update(kwargs)
+    entry.update(number=number, model=model, params=base.flatten_dict(params),
+                 args=args, results=os.path.join(results_dir, str(number)))
+    return entry
+
+
+def _write_mos(fname, experiments, packages, working_dir, results_dir,
+               command, results, create_dir=False, journal=None):
+    """Write a Modelica_ script for :meth:`write_script`.
+
+    *experiments* is an iterable of pairs of experiment numbers and
+    experiments.  If
+    *create_dir* is *True*, then the script creates the working directory.  If
+    *journal* is a :class:`Journal`, then the script records the states of the
+    experiments in it.
+    """
     # Create the Modelica script and write its header.
     mos = open(fname, 'w')
     mos.write('// Modelica experiment script written by modelicares %s\n'
@@ -684,6 +1574,8 @@ def write_script(experiments=[(None, {}, {})], packages=[],
     mos.write('import Modelica.Utilities.Files.copy;\n')
     mos.write('import Modelica.Utilities.Files.createDirectory;\n')
     mos.write('Advanced.TranslationInCommandLog = true "Also include translation log in command log";\n')
+    if create_dir:
+        mos.write('createDirectory("%s");\n' % working_dir)
     mos.write('cd("%s");\n' % working_dir)
     for package in packages:
         if package.endswith('.mos'):
@@ -704,16 +1596,16 @@ def write_script(experiments=[(None, {}, {})], packages=[],
     #          'ChuaCircuit");\n\n')
 
     # Write commands to run the experiments.
-    models = []
-    for i, (model, params, args) in zip(count(1), experiments):
-        # Create an abbreviated name for the model.
-        models.append(model[model.rfind('.')+1:])
-
+    for i, (model, params, args) in experiments:
         # Write to the Modelica script.
         mos.write('// Experiment %i\n' % i)
+        if journal is not None:
+            key = journal.key(model, params, args)
+            mos.write(_journal_line(journal, key, 'running', number=i))
         if model:
-            params = ParamDict(base.flatten_dict(params))
-            args['problem'] =  '"%s%s"' % (model, params)
+            if not isinstance(params, ParamRow):
+                params = ParamDict(base.flatten_dict(params))
+            args = dict(args, problem='"%s%s"' % (model, params))
         if args:
             mos.write('ok = %s%s;\n' % (command, ParamDict(args)))
         else:
@@ -725,6 +1617,13 @@ def write_script(experiments=[(None, {}, {})], packages=[],
         for result in results:
             mos.write('    copy("%s", destination + "%s", true);\n' %
                       (result, os.path.join(folder, result)))
+        if journal is not None:
+            mos.write('    ' + _journal_line(journal, key, 'done', number=i,
+                                             results=os.path.join(results_dir,
+                                                                  folder)))
+            mos.write('else\n')
+            mos.write('    ' + _journal_line(journal, key, 'failed',
+                                             number=i))
         mos.write('end if;\n')
         mos.write('clearlog();\n\n')
 
@@ -732,7 +1631,884 @@ def write_script(experiments=[(None, {}, {})], packages=[],
     # Otherwise, the script will hang until it is closed manually.
     mos.write("exit();\n")
     mos.close()
-    return models, results_dir
+
+
+def _journal_line(journal, key, state, **fields):
+    """Return a line of a Modelica_ script that appends a record to a
+    :class:`Journal`.
+    """
+    record = json.dumps(dict(fields, key=key, state=state, time=None),
+                        sort_keys=True)
+    return ('Modelica.Utilities.Streams.print("%s", "%s");\n'
+            % (record.replace('\\', '\\\\').replace('"', '\\"'),
+               journal.fname))
+
+
+def _estimate_costs(experiments, costs, manifest_name):
+    """Return a list of the estimated costs of experiments for
+    :meth:`write_script` (see the *costs* argument there).
+    """
+    if costs is None:
+        # Collect the CPU times of previous runs by experiment and by model.
+        try:
+            with open(manifest_name) as manifest:
+                previous = json.load(manifest)['experiments']
+        except (IOError, ValueError, KeyError):
+            previous = []
+        times = {}
+        known = {} # CPU times by the digests of the experiments
+        for entry in previous:
+            try:
+                cpu_time = read_dslog(os.path.join(entry['results'],
+                                                   'dslog.txt')).cpu_time
+            except IOError:
+                continue
+            if cpu_time is not None:
+                times.setdefault(entry['model'], []).append(cpu_time)
+                known[_experiment_digest(entry['model'], entry['params'],
+                                         entry['args']).hexdigest()] = cpu_time
+        costs = dict((model, np.mean(values))
+                     for model, values in times.items())
+        default = np.mean(costs.values()) if costs else 1
+        return [known.get(_experiment_digest(*experiment).hexdigest(),
+                          costs.get(experiment[0], default))
+                for experiment in experiments]
+    if isinstance(costs, dict):
+        default = np.mean(costs.values()) if costs else 1
+        return [costs.get(experiment[0], default)
+                for experiment in experiments]
+    return [costs(experiment) for experiment in experiments]
+
+
+class RunCache(object):
+    """Content-addressed cache of the results of simulation experiments
+
+    Each entry is a directory of result files, named by a key (hash) of the
+    model, the parameters, the simulation settings, and the contents of the
+    source files (e.g., the model executable or the Modelica_ packages).  An
+    experiment that has been run before with the same key doesn't need to be
+    run again; its results are linked from the cache instead.  This is used
+    by the *cache* argument of :meth:`run_models` and :meth:`write_script`.
+
+    The files are hard-linked into and out of the cache when possible (and
+    copied otherwise), so the results should be replaced rather than
+    modified in place.  The total size of the cache may be limited; the least
+    recently used entries are removed first.
+
+    **Initialization arguments:**
+
+    - *directory*: Directory of the cache (created if necessary; '~' may be
+      included for the user directory)
+
+    - *max_bytes*: Maximum total size of the cached files in bytes (*None* for
+      no limit)
+
+    **Example:**
+
+    .. code-block:: python
+
+       >>> import os
+       >>> from tempfile import mkdtemp
+       >>> from modelicares import *
+
+       >>> cache = RunCache(mkdtemp())
+       >>> key = cache.key('ChuaCircuit', {'L.L': 18}, {'stopTime': 2500})
+       >>> cache.get(key) is None
+       True
+       >>> cache.put(key, {'dsin.txt': 'examples/dsin.txt'})
+       >>> os.listdir(cache.get(key))
+       ['dsin.txt']
+
+       >>> # The key is independent of the form of the parameters and of
+       >>> # settings that are None:
+       >>> key == cache.key('ChuaCircuit', {'L': {'L': 18}},
+       ...                  {'stopTime': 2500, 'tolerance': None})
+       True
+
+    .. testcleanup::
+       >>> import shutil
+       >>> shutil.rmtree(cache.directory)
+    """
+
+    def __init__(self, directory, max_bytes=None):
+        from threading import Lock
+
+        self.directory = base.expand_path(directory)
+        self.max_bytes = max_bytes
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        self._lock = Lock()
+        self._checksums = {} # Checksums of files by (path, size, mtime)
+
+    def key(self, model, params, args, sources=[]):
+        """Return the key of an experiment.
+
+        **Arguments:**
+
+        - *model*: Name of the model
+
+        - *params*: Dictionary of parameter names and values (may be nested)
+
+        - *args*: Dictionary of simulation settings (keyword and value)
+
+        - *sources*: List of files or folders whose contents determine the
+          results (e.g., the model executable)
+
+             A folder is represented by all of the files within it.  A path
+             that doesn't exist is represented by its name.
+
+        Items with values of *None* in *params* and *args* are skipped.
+        """
+        digest = _experiment_digest(model, params, args)
+        for source in sources:
+            digest.update(self._checksum(source))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the directory of the entry with *key* or *None* if it isn't
+        in the cache.
+
+        The entry is marked as the most recently used.
+        """
+        entry = os.path.join(self.directory, key)
+        if not os.path.isdir(entry):
+            return None
+        try:
+            os.utime(entry, None)
+        except OSError:
+            return None # Removed in the meantime
+        return entry
+
+    def fetch(self, key, destinations):
+        """Link the files of the entry with *key* to their destinations.
+
+        **Arguments:**
+
+        - *key*: Key of the entry (see :meth:`key`)
+
+        - *destinations*: Dictionary of destination paths by the names of the
+          cached files or a directory into which all of the files should be
+          linked
+
+             Existing files at the destinations are replaced.  Names that
+             aren't in the entry are skipped.
+
+        **Returns:** List of the linked files or *None* if the entry isn't in
+        the cache
+        """
+        entry = self.get(key)
+        if entry is None:
+            return None
+        names = self._names(entry)
+        if isinstance(destinations, basestring):
+            destinations = dict((name, os.path.join(destinations, name))
+                                for name in names)
+        files = []
+        for name, destination in sorted(destinations.items()):
+            if name in names:
+                _link(os.path.join(entry, name), destination)
+                files.append(destination)
+        return files
+
+    def put(self, key, files):
+        """Add an entry to the cache.
+
+        **Arguments:**
+
+        - *key*: Key of the entry (see :meth:`key`)
+
+        - *files*: Dictionary of the paths of the files by the names under
+          which they should be cached
+
+        If the entry already exists, it is only marked as the most recently
+        used.  Afterwards, the least recently used entries are removed if the
+        cache is larger than *max_bytes*.
+        """
+        from tempfile import mkdtemp
+
+        if self.get(key) is None:
+            # Collect the files in a temporary directory and then rename it
+            # so that the entry appears at once.
+            staging = mkdtemp(prefix='.tmp-', dir=self.directory)
+            try:
+                for name, path in files.items():
+                    _link(path, os.path.join(staging, name))
+                os.rename(staging, os.path.join(self.directory, key))
+            except OSError:
+                shutil.rmtree(staging, ignore_errors=True)
+                if self.get(key) is None:
+                    raise
+        self.evict()
+
+    def evict(self, max_bytes=None):
+        """Remove the least recently used entries until the total size of the
+        cache is no more than *max_bytes* (by default, the limit given at
+        initialization).
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        if max_bytes is None:
+            return
+        with self._lock:
+            entries = []
+            for key in self.keys():
+                entry = os.path.join(self.directory, key)
+                try:
+                    entries.append((os.path.getmtime(entry),
+                                    self._size(entry), entry))
+                except OSError:
+                    continue
+            entries.sort()
+            total = sum(size for mtime, size, entry in entries)
+            for mtime, size, entry in entries:
+                if total <= max_bytes:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+
+    def collect(self, manifest_name):
+        """Add the results of the experiments listed in the manifest of
+        :meth:`write_script` to the cache.
+
+        The experiments must have been written with a cache (so that they
+        have keys) and run.  Experiments without a results folder (not run or
+        not successful) are skipped.
+
+        **Returns:** Number of entries that were added
+        """
+        with open(base.expand_path(manifest_name)) as manifest:
+            entries = json.load(manifest)['experiments']
+        n_added = 0
+        for entry in entries:
+            folder = entry['results']
+            if (not entry.get('key') or entry.get('cached')
+                or entry['key'] in self or not os.path.isdir(folder)):
+                continue
+            self.put(entry['key'], dict((name, os.path.join(folder, name))
+                                        for name in self._names(folder)))
+            n_added += 1
+        return n_added
+
+    def clear(self):
+        """Remove all of the entries.
+        """
+        for key in self.keys():
+            shutil.rmtree(os.path.join(self.directory, key),
+                          ignore_errors=True)
+
+    def keys(self):
+        """Return a list of the keys of the entries.
+        """
+        return [key for key in os.listdir(self.directory)
+                if not key.startswith('.')
+                and os.path.isdir(os.path.join(self.directory, key))]
+
+    def size(self):
+        """Return the total size of the cached files in bytes.
+        """
+        return sum(self._size(os.path.join(self.directory, key))
+                   for key in self.keys())
+
+    def _checksum(self, path):
+        """Return the checksum of a file or folder (see :meth:`key`).
+        """
+        path = base.expand_path(path)
+        if os.path.isdir(path):
+            digest = hashlib.sha1()
+            for name in sorted(self._names(path)):
+                digest.update(name)
+                digest.update(self._checksum(os.path.join(path, name)))
+            return digest.hexdigest()
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return hashlib.sha1(path).hexdigest()
+        signature = (path, stat.st_size, stat.st_mtime)
+        if signature not in self._checksums:
+            digest = hashlib.sha1()
+            with open(path, 'rb') as source:
+                for chunk in iter(lambda: source.read(2**20), ''):
+                    digest.update(chunk)
+            self._checksums[signature] = digest.hexdigest()
+        return self._checksums[signature]
+
+    @staticmethod
+    def _names(directory):
+        """Return the paths of the files within a directory, relative to the
+        directory.
+        """
+        names = []
+        for root, dirs, files in os.walk(directory):
+            names += [os.path.relpath(os.path.join(root, fname), directory)
+                      for fname in files]
+        return names
+
+    @staticmethod
+    def _size(directory):
+        """Return the total size of the files within a directory.
+        """
+        return sum(os.path.getsize(os.path.join(root, fname))
+                   for root, dirs, files in os.walk(directory)
+                   for fname in files)
+
+    def __contains__(self, key):
+        return os.path.isdir(os.path.join(self.directory, key))
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __repr__(self):
+        return "%s(%r, max_bytes=%r)" % (self.__class__.__name__,
+                                         self.directory, self.max_bytes)
+
+
+class Journal(object):
+    """Append-only journal of the states of simulation experiments, for
+    resuming a sweep after an interruption
+
+    The journal is a text file with one JSON record per line.  Each record has
+    the key of an experiment (see :meth:`key`), its state ('queued',
+    'running', 'done', or 'failed'), the time it was written, and other
+    fields such as the number of the experiment, the result files, and the
+    run time.  The latest record of an experiment determines its state.
+    Records are only appended, so the journal survives a crash or reboot; an
+    incomplete last line is ignored.
+
+    This is used by the *journal* argument of :meth:`run_models` and
+    :meth:`write_script`.  When a sweep is started again with the same
+    journal, only the experiments that aren't done are run.
+
+    **Initialization arguments:**
+
+    - *fname*: Name of the journal file (may include the file path; '~' may
+      be included for the user directory)
+
+    **Example:**
+
+    .. code-block:: python
+
+       >>> import os
+       >>> from tempfile import mkdtemp
+       >>> from modelicares import *
+
+       >>> journal = Journal(os.path.join(mkdtemp(), 'sweep.jsonl'))
+       >>> key = journal.key('ChuaCircuit', {'L.L': 18}, {'stopTime': 2500})
+       >>> journal.record(key, 'running', number=1)
+       >>> journal.record(key, 'done', number=1, results='1')
+       >>> journal.states()[key]['state']
+       u'done'
+       >>> journal.counts()
+       {u'done': 1}
+
+    .. testcleanup::
+       >>> import shutil
+       >>> shutil.rmtree(os.path.dirname(journal.fname))
+    """
+    STATES = ['queued', 'running', 'done', 'failed']
+    """States of an experiment"""
+
+    def __init__(self, fname):
+        from threading import Lock
+
+        self.fname = base.expand_path(fname)
+        directory = os.path.dirname(self.fname)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._lock = Lock()
+
+    @staticmethod
+    def key(model, params, args):
+        """Return the key of an experiment.
+
+        The key depends on the name of the model and the values of the
+        parameters and settings (other than *None*), but not on the order or
+        nesting of the parameters.
+        """
+        return _experiment_digest(model, params, args).hexdigest()
+
+    def record(self, key, state, **fields):
+        """Append a record of the state of an experiment.
+
+        **Arguments:**
+
+        - *key*: Key of the experiment (see :meth:`key`)
+
+        - *state*: State of the experiment (see :attr:`STATES`)
+
+        - *\*\*fields*: Other fields of the record (must be representable in
+          JSON)
+        """
+        self._append([dict(fields, key=key, state=state)])
+
+    def states(self):
+        """Return a dictionary of the latest records by the keys of the
+        experiments.
+
+        The fields of the earlier records of an experiment are included unless
+        they are overridden.
+        """
+        states = {}
+        try:
+            journal = open(self.fname)
+        except IOError:
+            return states
+        with journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue # Incomplete line from an interruption
+                states.setdefault(record['key'], {}).update(record)
+        return states
+
+    def done(self):
+        """Return the set of the keys of the experiments that are done.
+        """
+        return set(key for key, record in self.states().items()
+                   if record['state'] == 'done')
+
+    def counts(self):
+        """Return a dictionary of the numbers of experiments by state.
+        """
+        counts = {}
+        for record in self.states().values():
+            counts[record['state']] = counts.get(record['state'], 0) + 1
+        return counts
+
+    def _append(self, records):
+        """Append records (dictionaries) and flush them to the disk.
+        """
+        from datetime import datetime
+
+        now = datetime.now().isoformat()
+        lines = ''.join(json.dumps(dict(record, time=record.get('time', now)),
+                                   sort_keys=True, default=str) + '\n'
+                        for record in records)
+        with self._lock:
+            with open(self.fname, 'a+') as journal:
+                # Start a new line after an incomplete one.
+                journal.seek(0, os.SEEK_END)
+                if journal.tell():
+                    journal.seek(-1, os.SEEK_END)
+                    if journal.read(1) != '\n':
+                        lines = '\n' + lines
+                journal.write(lines)
+                journal.flush()
+                os.fsync(journal.fileno())
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.fname)
+
+
+def _experiment_digest(model, params, args):
+    """Return a SHA-1 hash object of an experiment for :meth:`RunCache.key`
+    and :meth:`Journal.key`.
+
+    Items with values of *None* in *params* and *args* are skipped.
+    """
+    def _plain(value):
+        """Convert a NumPy scalar to the equivalent Python value."""
+        return value.item() if isinstance(value, np.generic) else value
+
+    params = dict((name, _plain(value)) for name, value
+                  in base.flatten_dict(params).items() if value is not None)
+    args = dict((name, _plain(value)) for name, value in args.items()
+                if value is not None)
+    return hashlib.sha1(json.dumps([model, params, args], sort_keys=True,
+                                   default=str))
+
+
+def _link(src, dst):
+    """Hard-link (or copy) a file, replacing the destination if it exists.
+    """
+    if os.path.dirname(dst) and not os.path.isdir(os.path.dirname(dst)):
+        os.makedirs(os.path.dirname(dst))
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except (AttributeError, OSError):
+        shutil.copy2(src, dst) # No hard links (e.g., across devices)
+
+
+class DsinFile(object):
+    """Simulation initialization file (e.g., "dsin.txt"), parsed once for fast
+    access to many parameters
+
+    The file is split into lines and the position of the value of each
+    parameter is indexed by the name of the parameter.  Then each parameter is
+    read or set directly, without searching the text, and the file is written
+    by joining the lines.  This is much faster than calling
+    :meth:`read_params` or :meth:`write_params` with many parameters on a large
+    file.
+
+    Entries are recognized in two forms:
+
+    1. Variables in Dymola\ :sup:`®`'s 1- or 2-line format, where the value
+       is the second column::
+
+          -1      18                  0       0                  1  280   # L.L
+
+    2. Single values, as in the experiment and method sections::
+
+              1                   # StopTime     Time at which integration stops
+
+    If a name appears more than once, then the first entry is used.
+
+    **Initialization arguments:**
+
+    - *fname*: Name of the file (may include the file path)
+
+    **Example:**
+
+    .. code-block:: python
+
+       >>> from modelicares import *
+
+       >>> dsin = DsinFile('examples/dsin.txt')
+       >>> dsin['L.L']
+       18.0
+       >>> dsin.get(['C1.C', 'StopTime'])
+       [10.0, 1.0]
+       >>> dsin.update({'L.L': 10, 'C1.C': 15})
+       >>> dsin.write('examples/dsin-copy.txt')
+       >>> read_params(['L.L', 'C1.C'], 'examples/dsin-copy.txt')
+       [10.0, 15.0]
+
+    .. testcleanup::
+       >>> import os
+       >>> os.remove('examples/dsin-copy.txt')
+    """
+    # From Dymola, the columns of form 1 are:
+    # column 1: Type of initial value
+    #           = -2: special case: for continuing simulation
+    #                               (column 2 = value)
+    #           = -1: fixed value   (column 2 = fixed value)
+    #           =  0: free value, i.e., no restriction
+    #                               (column 2 = initial value)
+    #           >  0: desired value (column 1 = weight for
+    #                                           optimization
+    #                                column 2 = desired value)
+    #                 use weight=1, since automatic scaling usually
+    #                 leads to equally weighted terms
+    # column 2: fixed, free or desired value according to column 1.
+    # column 3: Minimum value (ignored, if Minimum >= Maximum).
+    # column 4: Maximum value (ignored, if Minimum >= Maximum).
+    #           Minimum and maximum restrict the search range in
+    #           initial value calculation. They might also be used
+    #           for scaling.
+    # column 5: Category of variable.
+    #           = 1: parameter.
+    #           = 2: state.
+    #           = 3: state derivative.
+    #           = 4: output.
+    #           = 5: input.
+    #           = 6: baseiliary variable.
+    # column 6: Data type of variable.
+    #           = 0: real.
+    #           = 1: boolean.
+    #           = 2: integer.
+    # If the line is too long, columns 5 and 6 are on the next line with the
+    # name.
+
+    def __init__(self, fname='dsin.txt'):
+        self.fname = fname
+        with open(fname, 'r') as src:
+            self._lines = src.readlines()
+        self._index = {} # name: [line number, start column, end column]
+        self._parse()
+
+    def _parse(self):
+        """Index the positions of the values in the lines of the file.
+        """
+        token = re.compile(r'\S+')
+        previous = [] # Tokens of the previous line, if it has no comment
+        for n, line in enumerate(self._lines):
+            code, sep, comment = line.partition('#')
+            tokens = token.findall(code) if sep else []
+            if sep and tokens and comment.split():
+                name = comment.split()[0]
+                if name not in self._index:
+                    if len(tokens) == 6:
+                        # Form 1 (1 line)
+                        self._index[name] = self._span(n, 1)
+                    elif len(tokens) == 1:
+                        # Form 2
+                        self._index[name] = self._span(n, 0)
+                    elif len(tokens) == 2 and len(previous) == 4:
+                        # Form 1 (2 lines)
+                        self._index[name] = self._span(n - 1, 1)
+            previous = [] if sep else token.findall(line)
+
+    def _span(self, n, i):
+        """Return the line number and the start and end columns of the *i*th
+        token of line *n*.
+        """
+        match = list(re.finditer(r'\S+', self._lines[n]))[i]
+        return [n, match.start(), match.end()]
+
+    def get(self, names):
+        """Return the value(s) of parameter(s).
+
+        **Arguments:**
+
+        - *names*: Parameter name or list of names (with full model path in
+          Modelica_ dot notation)
+
+        If *names* is a string, then the output is a single value (float).
+        Otherwise, it is a list of values.
+        """
+        if isinstance(names, basestring):
+            n, start, end = self._lookup(names)
+            return float(self._lines[n][start:end])
+        return [self.get(name) for name in names]
+
+    def set(self, name, value):
+        """Set the value of a parameter.
+
+        **Arguments:**
+
+        - *name*: Parameter name (with full model path in Modelica_ dot
+          notation)
+
+             The parameter name includes array indices (if any) in Modelica_
+             representation (1-based indexing).
+
+        - *value*: Value of the parameter
+
+             It must be representable as a scalar number (integer or floating
+             point).  *True* and *False* are mapped to 1 and 0.
+        """
+        value = _dsin_value(value)
+        entry = self._lookup(name)
+        n, start, end = entry
+        line = self._lines[n]
+        self._lines[n] = line[:start] + value + line[end:]
+        entry[2] = start + len(value)
+
+    def template(self, names):
+        """Return a template (:class:`DsinTemplate`) to write variants of the
+        file with different values of some parameters.
+
+        **Arguments:**
+
+        - *names*: List of the names of the parameters that vary
+        """
+        return DsinTemplate(self, names)
+
+    def update(self, params):
+        """Set the values of parameters from a dictionary (see :meth:`set`).
+        """
+        for name, value in params.items():
+            self.set(name, value)
+
+    def write(self, fname=None):
+        """Write the file.
+
+        **Arguments:**
+
+        - *fname*: Name of the file (by default, the file that was read)
+        """
+        with open(fname or self.fname, 'w') as dst:
+            dst.writelines(self._lines)
+
+    def names(self):
+        """Return a list of the names of all of the indexed entries.
+        """
+        return self._index.keys()
+
+    def _lookup(self, name):
+        """Return the index entry of a parameter.
+        """
+        try:
+            return self._index[name]
+        except KeyError:
+            raise AssertionError(
+                "Parameter %s does not exist or is not formatted as expected "
+                "in %s." % (name, self.fname))
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __setitem__(self, name, value):
+        self.set(name, value)
+
+
+class DsinTemplate(object):
+    """Template to write many variants of a simulation initialization file that
+    differ in the values of a few parameters
+
+    The text of the file is split once at the values of the parameters that
+    vary.  Then each variant is created by joining the fixed pieces of text
+    with the values, without parsing or searching the file again.
+
+    **Initialization arguments:**
+
+    - *dsin*: Parsed file (:class:`DsinFile`) or name of the file
+
+    - *names*: List of the names of the parameters that vary
+
+    **Example:**
+
+    .. code-block:: python
+
+       >>> from modelicares import *
+
+       >>> template = DsinTemplate('examples/dsin.txt', ['L.L', 'C1.C'])
+       >>> fnames = template.write_all([{'L.L': 16}, {'L.L': 20, 'C1.C': 8}],
+       ...                             ['examples/dsin-1.txt',
+       ...                              'examples/dsin-2.txt'])
+       >>> read_params(['L.L', 'C1.C'], 'examples/dsin-2.txt')
+       [20.0, 8.0]
+       >>> # Parameters that aren't given keep their original values:
+       >>> read_params(['L.L', 'C1.C'], 'examples/dsin-1.txt')
+       [16.0, 10.0]
+
+    .. testcleanup::
+       >>> import os
+       >>> for fname in fnames:
+       ...     os.remove(fname)
+    """
+
+    def __init__(self, dsin, names):
+        if isinstance(dsin, basestring):
+            dsin = DsinFile(dsin)
+        self.fname = dsin.fname
+        self.names = list(names)
+
+        # Find the offsets of the values in the text.
+        starts = np.cumsum([0] + [len(line) for line in dsin._lines])
+        spans = sorted((starts[n] + start, starts[n] + end, i)
+                       for i, (n, start, end)
+                       in enumerate(dsin._lookup(name) for name in self.names))
+
+        # Split the text.
+        text = ''.join(dsin._lines)
+        self._pieces = [] # Fixed text before each value and at the end
+        self._order = [] # Index into self.names of each value
+        self._defaults = [None]*len(self.names) # Original values
+        position = 0
+        for start, end, i in spans:
+            self._pieces.append(text[position:start])
+            self._order.append(i)
+            self._defaults[i] = text[start:end]
+            position = end
+        self._pieces.append(text[position:])
+
+    def render(self, values):
+        """Return the text of the file with the given values.
+
+        **Arguments:**
+
+        - *values*: Dictionary of parameter names and values or a list of
+          values in the order of *names*
+
+             Parameters that are not in the dictionary keep their original
+             values.  The values are formatted as by :meth:`DsinFile.set`.
+        """
+        if isinstance(values, dict):
+            fields = [_dsin_value(values[name]) if name in values
+                      else default
+                      for name, default in zip(self.names, self._defaults)]
+        else:
+            assert len(values) == len(self.names), (
+                "There must be one value per parameter of the template.")
+            fields = [_dsin_value(value) for value in values]
+        parts = [None]*(2*len(self._order) + 1)
+        parts[::2] = self._pieces
+        parts[1::2] = [fields[i] for i in self._order]
+        return ''.join(parts)
+
+    def write(self, fname, values):
+        """Write a variant of the file.
+
+        **Arguments:**
+
+        - *fname*: Name of the file to be written (may include the path)
+
+        - *values*: Values of the parameters (see :meth:`render`)
+        """
+        with open(fname, 'w') as dst:
+            dst.write(self.render(values))
+
+    def write_all(self, values, fnames, workers=1):
+        """Write variants of the file.
+
+        **Arguments:**
+
+        - *values*: List of the values of the parameters for each variant (see
+          :meth:`render`)
+
+        - *fnames*: List of the names of the files to be written
+
+             The directories are created if necessary.
+
+        - *workers*: Number of processes (*None* for one per CPU)
+
+        **Returns:** List of the names of the files
+        """
+        fnames = list(fnames)
+        values = list(values)
+        assert len(values) == len(fnames), ("There must be one set of values "
+                                            "per file.")
+        jobs = zip(fnames, values)
+        if workers == 1:
+            for job in jobs:
+                _write_variant(job, self)
+        else:
+            from multiprocessing import cpu_count, Pool
+
+            workers = workers or cpu_count()
+            pool = Pool(workers, initializer=_init_template_worker,
+                        initargs=(self,))
+            try:
+                pool.map(_write_variant, jobs,
+                         chunksize=max(1, len(jobs)//(4*workers)))
+            finally:
+                pool.close()
+                pool.join()
+        return fnames
+
+
+_template = None # Template of the worker processes of DsinTemplate.write_all()
+
+
+def _init_template_worker(template):
+    """Initialize a worker process of :meth:`DsinTemplate.write_all`.
+    """
+    global _template
+    _template = template
+
+
+def _write_variant(job, template=None):
+    """Write a variant of a file for :meth:`DsinTemplate.write_all`.
+    """
+    fname, values = job
+    directory = os.path.dirname(fname)
+    if directory and not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            pass # Created by another process
+    (template or _template).write(fname, values)
+
+
+def _dsin_value(value):
+    """Return the text of a value for a simulation initialization file.
+    """
+    if isinstance(value, bool):
+        value = 1 if value else 0
+    assert not isinstance(value, np.ndarray), ("Arrays must be split "
+        "into scalars for the simulation initialization file.")
+    assert not isinstance(value, basestring), ("Strings cannot be "
+        "used as values in the simulation initialization file.")
+    return str(value)
 
 
 class ParamDict(dict):
@@ -822,6 +2598,128 @@ class ParamDict(dict):
         return _str(root)
 
 
+class ParamRow(Mapping):
+    """Read-only dictionary view of the parameters of an experiment in an
+    :class:`ExperimentSet`
+
+    The names are shared with the set and the values are stored in a tuple.
+    Like :class:`ParamDict`, an instance prints as Modelica_ modifiers, but
+    from a template that is made once for the names (see
+    :meth:`ParamRow.__str__`).
+
+    **Initialization arguments:**
+
+    - *names*: Tuple of the parameter names (including the full model path in
+      Modelica_ dot notation)
+
+    - *values*: Tuple of the parameter values in the same order
+
+    - *modifiers*: Template of the modifiers for *names* (internal; made from
+      *names* if it is *None*)
+
+    **Example:**
+
+    .. code-block:: python
+
+       >>> from modelicares import *
+
+       >>> params = ParamRow(('a', 'b.c', 'b.d'), (1, 2.5, True))
+       >>> print(params)
+       (a=1, b(c=2.5, d=true))
+       >>> params['b.c']
+       2.5
+       >>> dict(params) == {'a': 1, 'b.c': 2.5, 'b.d': True}
+       True
+    """
+    __slots__ = ('names', 'values', '_modifiers')
+
+    def __init__(self, names, values, modifiers=None):
+        self.names = names
+        self.values = values
+        self._modifiers = modifiers or _Modifiers(names)
+
+    def __getitem__(self, name):
+        return self.values[self._modifiers.positions[name]]
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __str__(self):
+        """Map the parameters to a string using tuple-based modifiers formatted
+        for Modelica_.
+
+        The values are formatted as in :meth:`ParamDict.__str__`, but the
+        modifiers are in the order of the names (grouped by the nesting) and
+        they are filled into a template rather than nested for each
+        experiment.
+        """
+        return self._modifiers.format(self.values)
+
+
+class _Modifiers(object):
+    """Template of the Modelica_ modifiers of a tuple of parameter names (see
+    :class:`ParamRow`)
+    """
+
+    def __init__(self, names):
+        from collections import OrderedDict
+
+        self.positions = dict((name, i) for i, name in enumerate(names))
+        self.names = names
+
+        # Nest the names.
+        root = OrderedDict()
+        for i, name in enumerate(names):
+            branch = root
+            elements = name.split('.')
+            for element in elements[:-1]:
+                branch = branch.setdefault(element, OrderedDict())
+                assert isinstance(branch, dict), (
+                    'The parameter "%s" is within another parameter.' % name)
+            assert elements[-1] not in branch, (
+                'The parameter "%s" contains other parameters.' % name)
+            branch[elements[-1]] = i
+
+        # Write the template.
+        self.order = []
+
+        def _template(branch):
+            """Return the template of the modifiers of a branch."""
+            elements = []
+            for element, node in branch.items():
+                element = element.replace('%', '%%')
+                if isinstance(node, dict):
+                    elements.append(element + _template(node))
+                else:
+                    elements.append(element + '=%s')
+                    self.order.append(node)
+            return '(%s)' % ', '.join(elements)
+
+        self.template = _template(root) if names else ''
+
+    def format(self, values):
+        """Return the modifiers of a tuple of values (in the order of the
+        names).
+        """
+        if any(value is None for value in values):
+            return str(ParamDict(zip(self.names, values)))
+        strings = []
+        for i in self.order:
+            value = values[i]
+            if isinstance(value, bool):
+                value = modelica_boolean(value)
+            elif isinstance(value, np.ndarray):
+                value = modelica_array(value)
+            strings.append(value)
+        return self.template % tuple(strings)
+
+
 if __name__ == '__main__':
     """Test the contents of this file."""
     import doctest
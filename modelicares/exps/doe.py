@@ -2,11 +2,79 @@
 """Functions to design experiments (i.e., design of experiments (DOE))
 
 These can be passed to the *design* argument of :meth:`exps.gen_experiments`.
+Each design is called with the list of levels of each dimension (factor) and
+returns an iterable of the settings.
+
+- :meth:`fullfact`, :meth:`aslisted`, and :meth:`ofat` step through the levels
+  as listed.
+
+- :meth:`lhs`, :meth:`halton`, and :meth:`sobol` return space-filling designs
+  with a given number of experiments.  Each dimension may be a list of
+  discrete levels or a continuous range (:class:`Uniform`).
+
+- :meth:`fracfact` and :meth:`pbdesign` return 2-level screening designs.  The
+  first and last levels of each dimension are used.
+
+- :meth:`adaptive` chooses each batch of experiments from the results of the
+  previous ones.
+
+The space-filling and 2-level designs are created by calling a function with
+the options of the design, e.g., ``design=doe.lhs(20, seed=0)``.  Dimensions
+with a single level (e.g., a single model) are held constant and don't count
+as factors.  The settings are generated one at a time.
 """
 
+import numpy as np
+
+from collections import namedtuple
 from itertools import product
 
 
+Uniform = namedtuple('Uniform', ['low', 'high'])
+"""Named tuple class to represent a continuous range of a factor
+
+In the space-filling designs (:meth:`lhs`, :meth:`halton`, and :meth:`sobol`),
+the values are spread between *low* and *high*.  The other designs take *low*
+and *high* as two levels.
+
+**Example:**
+
+.. code-block:: python
+
+   >>> from modelicares import *
+
+   >>> experiments = gen_experiments(['ChuaCircuit'],
+   ...                               {'L.L': doe.Uniform(16, 20)},
+   ...                               design=doe.lhs(3, seed=0))
+   >>> for experiment in experiments:
+   ...     print(experiment.params)
+   (L(L=17.9...))
+   (L(L=19.1...))
+   (L(L=16.7...))
+"""
+
+SOBOL_DIRECTIONS = [(1, 0, [1]), (2, 1, [1, 3]), (3, 1, [1, 3, 1]),
+                    (3, 2, [1, 1, 1]), (4, 1, [1, 1, 3, 3]),
+                    (4, 4, [1, 3, 5, 13]), (5, 2, [1, 1, 5, 5, 17]),
+                    (5, 4, [1, 1, 5, 5, 5]), (5, 7, [1, 1, 7, 11, 19]),
+                    (5, 11, [1, 1, 5, 1, 1]), (5, 13, [1, 1, 1, 3, 11]),
+                    (5, 14, [1, 3, 5, 5, 31]), (6, 1, [1, 3, 3, 9, 7, 49]),
+                    (6, 13, [1, 1, 1, 15, 21, 21]),
+                    (6, 16, [1, 3, 1, 13, 27, 49]),
+                    (6, 19, [1, 1, 1, 15, 7, 5]),
+                    (6, 22, [1, 3, 1, 15, 13, 25]),
+                    (6, 25, [1, 1, 5, 5, 19, 61]),
+                    (7, 1, [1, 3, 7, 11, 23, 15, 103]),
+                    (7, 4, [1, 3, 7, 13, 13, 15, 69])]
+"""Degree (*s*), coefficients (*a*), and initial direction numbers (*m*) of
+the Sobol sequence for the second and following dimensions (S. Joe and F. Y.
+Kuo, "Constructing Sobol sequences with better two-dimensional projections,"
+2008)"""
+
+SOBOL_BITS = 30
+"""Number of bits of the Sobol sequence"""
+
+
 def fullfact(*space):
     """Full-factorial DOE
 
@@ -85,6 +153,512 @@ def ofat(*space):
             else:
                 yield tuple(baseline[:i] + [level] + baseline[i+1:])
 
+
+def lhs(n, seed=None):
+    """Latin hypercube design
+
+    The range of each factor is divided into *n* equal strata and each stratum
+    is sampled once (at a random position) in a random order.  For discrete
+    levels, the strata are mapped to the levels, so each level is used
+    equally often if *n* is a multiple of the number of levels.
+
+    **Arguments:**
+
+    - *n*: Number of experiments
+
+    - *seed*: Seed for the random number generator (*None* for a different
+      design each time)
+
+    **Returns:** Design function for :meth:`exps.gen_experiments`
+
+    **Example**
+
+    .. code-block:: python
+
+       >>> from modelicares import *
+
+       >>> design = doe.lhs(4, seed=1)
+       >>> for s in design(['a', 'b'], [0, 1], ['ChuaCircuit']):
+       ...     print(s)
+       ('b', 0, 'ChuaCircuit')
+       ('b', 1, 'ChuaCircuit')
+       ('a', 0, 'ChuaCircuit')
+       ('a', 1, 'ChuaCircuit')
+    """
+    def design(*space):
+        random = np.random.RandomState(seed)
+        strata = [random.permutation(n) for i in _factors(space)]
+
+        def _points():
+            for k in range(n):
+                yield [(stratum[k] + random.uniform())/n for stratum in strata]
+
+        return _fill(space, _points())
+
+    return design
+
+def halton(n, skip=0, seed=None):
+    """Halton low-discrepancy design
+
+    Factor *i* uses the radical inverse of the experiment number in the base of
+    the *i*\ th prime number.  The sequence is deterministic and can be
+    continued (see *skip*).  It is best for a moderate number of factors (up
+    to about 10).
+
+    **Arguments:**
+
+    - *n*: Number of experiments
+
+    - *skip*: Number of points of the sequence to skip
+
+    - *seed*: Seed of a random shift (modulo 1) of all of the points (*None*
+      for no shift)
+
+    **Returns:** Design function for :meth:`exps.gen_experiments`
+
+    **Example**
+
+    .. code-block:: python
+
+       >>> from modelicares import *
+
+       >>> design = doe.halton(4)
+       >>> for s in design(doe.Uniform(0, 8), doe.Uniform(0, 9)):
+       ...     print(s)
+       (4.0, 3.0)
+       (2.0, 6.0)
+       (6.0, 1.0)
+       (1.0, 4.0)
+    """
+    def design(*space):
+        bases = _primes(len(_factors(space)))
+        shift = (np.random.RandomState(seed).uniform(size=len(bases))
+                 if seed is not None else np.zeros(len(bases)))
+
+        def _points():
+            for k in range(skip + 1, skip + n + 1):
+                yield [(_radical_inverse(k, base) + offset) % 1
+                       for base, offset in zip(bases, shift)]
+
+        return _fill(space, _points())
+
+    return design
+
+def sobol(n, skip=0, seed=None):
+    """Sobol low-discrepancy design
+
+    The first 2\ :sup:`m` points of a Sobol sequence are well stratified in
+    each factor and in pairs of factors, so *n* is best chosen as a power of
+    2.  Up to %i factors are supported.
+
+    **Arguments:**
+
+    - *n*: Number of experiments
+
+    - *skip*: Number of points of the sequence to skip
+
+         The first point of the sequence is the lower corner (all factors at
+         their lowest levels).
+
+    - *seed*: Seed of a random digital shift of all of the points (*None* for
+      no shift)
+
+         The shift preserves the stratification of the sequence.
+
+    **Returns:** Design function for :meth:`exps.gen_experiments`
+
+    **Example**
+
+    .. code-block:: python
+
+       >>> from modelicares import *
+
+       >>> design = doe.sobol(4)
+       >>> for s in design(doe.Uniform(0, 8), doe.Uniform(0, 8), [1, 2, 3, 4]):
+       ...     print(s)
+       (0.0, 0.0, 1)
+       (4.0, 4.0, 3)
+       (6.0, 2.0, 2)
+       (2.0, 6.0, 4)
+    """
+    def design(*space):
+        n_factors = len(_factors(space))
+        assert n_factors <= len(SOBOL_DIRECTIONS) + 1, ("The Sobol design "
+            "supports up to %i factors." % (len(SOBOL_DIRECTIONS) + 1))
+        shift = (np.random.RandomState(seed).randint(0, 2**SOBOL_BITS,
+                                                      size=n_factors)
+                 if seed is not None else [0]*n_factors)
+        return _fill(space, _sobol_points(n, n_factors, skip, shift))
+
+    return design
+
+sobol.__doc__ = sobol.__doc__ % (len(SOBOL_DIRECTIONS) + 1)
+
+def fracfact(generator):
+    """2-level fractional factorial design
+
+    **Arguments:**
+
+    - *generator*: String with the column of each factor, separated by spaces
+
+         Each letter is a base factor and the base factors are combined in a
+         full-factorial design.  A word of several letters is the product
+         (interaction) of those base factors.  A leading '-' reverses a
+         column.  For example, 'a b c abc' is a 2\ :sup:`4-1` design
+         (resolution IV) with 8 experiments.
+
+    **Returns:** Design function for :meth:`exps.gen_experiments`
+
+    There must be one column for each factor.  The first and last levels of
+    each factor are used.
+
+    **Example**
+
+    .. code-block:: python
+
+       >>> from modelicares import *
+
+       >>> design = doe.fracfact('a b ab')
+       >>> for s in design([0, 1], [0, 1], [0, 1]):
+       ...     print(s)
+       (0, 0, 1)
+       (1, 0, 0)
+       (0, 1, 0)
+       (1, 1, 1)
+    """
+    words = generator.lower().split()
+    base = sorted(set(''.join(words)) - set('+-'))
+
+    def design(*space):
+        assert len(words) == len(_factors(space)), ("The generator has %i "
+            "columns, but there are %i factors." % (len(words),
+                                                    len(_factors(space))))
+
+        def _rows():
+            for k in range(2**len(base)):
+                signs = dict((letter, 1 if k >> j & 1 else -1)
+                             for j, letter in enumerate(base))
+                row = []
+                for word in words:
+                    x = -1 if word.startswith('-') else 1
+                    for letter in word.lstrip('+-'):
+                        x *= signs[letter]
+                    row.append(x)
+                yield row
+
+        return _two_level(space, _rows())
+
+    return design
+
+def pbdesign(*space):
+    """Plackett-Burman 2-level screening design
+
+    The number of experiments is the smallest number of the form
+    2\ :sup:`k`, 12*2\ :sup:`k`, or 20*2\ :sup:`k` that is greater than the
+    number of factors.  The main effects are orthogonal.  The first and last
+    levels of each factor are used.
+
+    **Example**
+
+    .. code-block:: python
+
+       >>> from modelicares import *
+
+       >>> settings = doe.pbdesign([0, 1], [0, 1], [0, 1])
+       >>> for s in settings:
+       ...     print(s)
+       (1, 1, 1)
+       (0, 1, 0)
+       (1, 0, 0)
+       (0, 0, 1)
+    """
+    n_factors = len(_factors(space))
+    n = 1
+    while n <= n_factors:
+        n *= 2
+    for size in [12, 20]:
+        # Use a smaller Paley-based design if possible.
+        m = size
+        while m <= n_factors:
+            m *= 2
+        n = min(n, m)
+    H = _hadamard(n)
+    H *= H[:, :1] # Normalize so that the first column is all ones.
+    return _two_level(space, (row[1:] for row in H))
+
+def adaptive(response=None, tol=0, initial=8, batch=4, max_experiments=100,
+             resolution=1e-3):
+    """Adaptive sequential design driven by the results of previous
+    experiments
+
+    The experiments are generated in batches.  The first batch is the start of
+    a Sobol sequence (see :meth:`sobol`), which spreads the experiments over
+    the space.  After each batch, the results are sent back to the design
+    (via the generator's :meth:`send` method) and the next batch is placed
+    midway between neighboring experiments where the response changes the
+    most.  The design stops once the response changes by no more than *tol*
+    between all neighbors (or the neighbors are closer than *resolution*) or
+    once *max_experiments* have been generated.
+
+    **Arguments:**
+
+    - *response*: Function that returns the response (a number) from the
+      result of an experiment (e.g., an instance of
+      :class:`~modelicares.simres.SimRes`)
+
+         If *response* is *None*, then the results must be the responses.
+
+    - *tol*: Largest change in the response between neighboring experiments
+      that needs no refinement
+
+    - *initial*: Number of experiments in the first batch
+
+    - *batch*: Maximum number of experiments in each following batch
+
+    - *max_experiments*: Maximum total number of experiments
+
+    - *resolution*: Smallest distance between neighbors that is refined, as a
+      fraction of the range of each factor
+
+    **Returns:** Design function for :meth:`exps.gen_experiments`
+
+    The generator from :meth:`exps.gen_experiments` yields lists of
+    experiments (batches) rather than single experiments.  Send a list with
+    the result of each experiment of the batch to get the next batch.  A
+    result of *None* (e.g., a failed simulation) is not used.  The points are
+    compared in the unit hypercube, so the factors are scaled by their
+    ranges.  The number of factors is limited as in :meth:`sobol`.  Discrete
+    levels are supported, but a point that maps to an experiment that has
+    already been run is skipped.
+
+    **Example**
+
+    .. code-block:: python
+
+       >>> from modelicares import *
+
+       >>> experiments = gen_experiments(['ChuaCircuit'],
+       ...                               {'L.L': doe.Uniform(16, 20)},
+       ...                               design=doe.adaptive(tol=0.1))
+       >>> batch = experiments.next()
+       >>> values = []
+       >>> while True:
+       ...     values += [experiment.params['L.L'] for experiment in batch]
+       ...     # Run the experiments.  Here, a step is simulated.
+       ...     responses = [float(experiment.params['L.L'] > 18.3)
+       ...                  for experiment in batch]
+       ...     try:
+       ...         batch = experiments.send(responses)
+       ...     except StopIteration:
+       ...         break
+       >>> len(values)
+       18
+       >>> # The experiments are concentrated around the step:
+       >>> max(value for value in values if value < 18.3)
+       18.296875
+       >>> min(value for value in values if value > 18.3)
+       18.30078125
+    """
+    def design(*space):
+        n_factors = len(_factors(space))
+        assert n_factors <= len(SOBOL_DIRECTIONS) + 1, ("The adaptive design "
+            "supports up to %i factors." % (len(SOBOL_DIRECTIONS) + 1))
+        points = [] # Positions in the unit hypercube of the results
+        values = [] # Responses
+        settings = set() # Settings that have been generated
+        proposal = list(_sobol_points(initial if n_factors else 1, n_factors))
+        n = 0
+        while proposal and n < max_experiments:
+            # Generate a batch of experiments.
+            proposal = proposal[:max_experiments - n]
+            experiments = list(_fill(space, proposal))
+            results = yield experiments
+            assert results is not None and len(results) == len(experiments), (
+                "Send a list with one result per experiment in the batch.")
+            n += len(experiments)
+            settings.update(experiments)
+            for point, result in zip(proposal, results):
+                if result is not None:
+                    points.append(point)
+                    values.append(float(result if response is None
+                                        else response(result)))
+
+            # Choose the next batch.
+            proposal = []
+            for point in _refine(points, values, tol, resolution):
+                setting = tuple(_fill(space, [point]))[0]
+                if setting not in settings:
+                    settings.add(setting)
+                    proposal.append(point)
+                    if len(proposal) == batch:
+                        break
+
+    design.batches = True # gen_experiments() yields lists of experiments.
+    return design
+
+def _refine(points, values, tol, resolution):
+    """Return a list of the midpoints between neighboring points where the
+    values change by more than *tol*, in order of decreasing change.
+    """
+    if len(points) < 2:
+        return []
+    points = np.array(points)
+    values = np.array(values)
+    n_neighbors = min(2*points.shape[1], len(points) - 1)
+    distances = np.sqrt(((points[:, np.newaxis, :]
+                          - points[np.newaxis, :, :])**2).sum(axis=2))
+    pairs = set()
+    for i, row in enumerate(distances):
+        for j in np.argsort(row)[1:n_neighbors+1]:
+            pairs.add((min(i, j), max(i, j)))
+    changes = sorted(((abs(values[i] - values[j]), i, j) for i, j in pairs
+                      if abs(values[i] - values[j]) > tol
+                      and distances[i, j] > resolution), reverse=True)
+    midpoints = []
+    for change, i, j in changes:
+        midpoint = (points[i] + points[j])/2
+        if all(np.abs(midpoint - other).max() > resolution/2
+               for other in midpoints):
+            midpoints.append(midpoint)
+    return midpoints
+
+def _factors(space):
+    """Return the indices of the dimensions that vary.
+    """
+    return [i for i, dimension in enumerate(space)
+            if isinstance(dimension, Uniform) or len(dimension) > 1]
+
+def _fill(space, points):
+    """Return a generator of the settings at points in the unit hypercube.
+    """
+    factors = _factors(space)
+    setting = [dimension[0] for dimension in space]
+    for point in points:
+        for i, u in zip(factors, point):
+            dimension = space[i]
+            if isinstance(dimension, Uniform):
+                setting[i] = float(dimension.low
+                                   + u*(dimension.high - dimension.low))
+            else:
+                setting[i] = dimension[min(int(u*len(dimension)),
+                                           len(dimension) - 1)]
+        yield tuple(setting)
+
+def _two_level(space, rows):
+    """Return a generator of the settings of a 2-level design (rows of -1 and
+    1).
+    """
+    factors = _factors(space)
+    setting = [dimension[0] for dimension in space]
+    for row in rows:
+        for i, x in zip(factors, row):
+            setting[i] = space[i][0] if x < 0 else space[i][-1]
+        yield tuple(setting)
+
+def _primes(n):
+    """Return a list of the first *n* prime numbers.
+    """
+    primes = []
+    candidate = 2
+    while len(primes) < n:
+        if all(candidate % p for p in primes):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+def _radical_inverse(k, base):
+    """Return the radical inverse of an integer in a base.
+    """
+    result = 0.0
+    f = 1.0/base
+    while k:
+        k, digit = divmod(k, base)
+        result += digit*f
+        f /= base
+    return result
+
+def _lowest_zero_bit(k):
+    """Return the position of the lowest zero bit of an integer.
+    """
+    bit = 0
+    while k & 1:
+        k >>= 1
+        bit += 1
+    return bit
+
+def _sobol_points(n, n_factors, skip=0, shift=None):
+    """Return a generator of *n* points of the Sobol sequence in the unit
+    hypercube, starting at point number *skip*.
+
+    *shift* is a list of integers (one per factor) for a digital shift.
+    """
+    directions = [_sobol_directions(*entry) for entry
+                  in [(None, None, None)] + SOBOL_DIRECTIONS][:n_factors]
+    if shift is None:
+        shift = [0]*n_factors
+    scale = 2.0**-SOBOL_BITS
+
+    # Start at the point number skip (from its Gray code).
+    gray = skip ^ (skip >> 1)
+    x = [0]*n_factors
+    for j, v in enumerate(directions):
+        for bit in range(SOBOL_BITS):
+            if gray >> bit & 1:
+                x[j] ^= v[bit]
+    for k in range(skip, skip + n):
+        yield [(xj ^ sj)*scale for xj, sj in zip(x, shift)]
+        # Step to the next point by changing one direction number (Gray code
+        # order).
+        bit = _lowest_zero_bit(k)
+        x = [xj ^ v[bit] for xj, v in zip(x, directions)]
+
+def _sobol_directions(s, a, m):
+    """Return the direction numbers of a dimension of the Sobol sequence.
+
+    If *s* is *None*, then the numbers are for the first dimension.
+    """
+    if s is None:
+        return [1 << (SOBOL_BITS - 1 - k) for k in range(SOBOL_BITS)]
+    v = [m[k] << (SOBOL_BITS - 1 - k) for k in range(s)]
+    for k in range(s, SOBOL_BITS):
+        value = v[k-s] ^ (v[k-s] >> s)
+        for l in range(1, s):
+            if a >> (s - 1 - l) & 1:
+                value ^= v[k-l]
+        v.append(value)
+    return v
+
+def _hadamard(n):
+    """Return a Hadamard matrix of order *n*, where *n* is 2\ :sup:`k`,
+    12*2\ :sup:`k`, or 20*2\ :sup:`k`.
+    """
+    if n % 12 == 0 and (n//12) & (n//12 - 1) == 0:
+        H = _paley(11)
+        n //= 12
+    elif n % 20 == 0 and (n//20) & (n//20 - 1) == 0:
+        H = _paley(19)
+        n //= 20
+    else:
+        assert n & (n - 1) == 0, "There is no Hadamard matrix of order %i." % n
+        H = np.ones((1, 1), dtype=int)
+    while n > 1:
+        # Sylvester's construction
+        H = np.vstack([np.hstack([H, H]), np.hstack([H, -H])])
+        n //= 2
+    return H
+
+def _paley(q):
+    """Return a Hadamard matrix of order q + 1 by Paley's construction, where
+    q is a prime number such that q % 4 == 3.
+    """
+    residues = set((i*i) % q for i in range(1, q))
+    chi = [0] + [1 if i in residues else -1 for i in range(1, q)]
+    H = np.eye(q + 1, dtype=int)
+    H[0, 1:] = 1
+    H[1:, 0] = -1
+    H[1:, 1:] += [[chi[(j - i) % q] for j in range(q)] for i in range(q)]
+    return H
+
 if __name__ == '__main__':
     """Test the contents of this file."""
     import doctest
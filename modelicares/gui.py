@@ -8,18 +8,62 @@ __copyright__ = "Copyright 2012-2013, Georgia Tech Research Corporation"
 __license__ = "BSD-compatible (see LICENSE.txt)"
 
 
+import re
 import wx
+import numpy as np
 
+from collections import namedtuple
+from threading import Condition, Thread
 from matplotlib import rcParams
 from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg as FigureCanvas
 from matplotlib.figure import Figure
 
+from modelicares.base import downsample
 from modelicares.texunit import unit2tex
 
 
+# Maximum number of variables listed by a search in the browser
+_MAX_MATCHES = 1000
+
+
+_Series = namedtuple('_Series', ['label', 'unit', 'times', 'values',
+                                 'plot_times', 'plot_values'])
+# Data of a variable in the preview.  The full data (*times* and *values*) is
+# used by the time cursor.  The reduced data (*plot_times* and *plot_values*) is
+# plotted.
+
+
+def _load_series(name, sim, n_buckets, label=None):
+    """Load the data of a variable for the preview.
+    """
+    if name not in sim:
+        raise ValueError("%s is not a valid variable name." % name)
+    times = sim.get_times(name)
+    values = sim.get_values(name)
+    if len(times) > 1 and np.all(np.diff(times) >= 0):
+        plot_times, plot_values = downsample(times, values, n_buckets)
+    else:
+        plot_times, plot_values = times, values
+    return _Series(name if label is None else label,
+                   unit2tex(sim.get_unit(name)), times, values, plot_times,
+                   plot_values)
+
+
 class PreviewPanel(wx.Panel):
     """Class that is a panel for information about a variable (used in
     :meth:`simres.SimRes.browse`)
+
+    The data is loaded and reduced to the resolution of the plot in a
+    background thread so that the interface stays responsive.  If a new
+    variable is selected before the previous one has been plotted, then the
+    previous request is discarded.  If the data can't be loaded, an error
+    message is shown in the plot.  The thread stops when the panel is
+    destroyed.
+
+    Variables can be pinned to keep them in the plot while others are
+    selected (see :meth:`pin`).  A time cursor follows the mouse and lists the
+    values of all of the plotted variables.  It is drawn by blitting, so the
+    plot itself is not redrawn.
     """
     def __init__(self, parent, id):
 
@@ -38,37 +82,262 @@ class PreviewPanel(wx.Panel):
                                     top=0.95)
         self.axes = self.figure.add_subplot(111)
         self.canvas = FigureCanvas(self, -1, self.figure)
+        pin_button = wx.Button(self, -1, 'Pin')
+        pin_button.SetToolTipString('Keep the selected variable in the plot')
+        unpin_button = wx.Button(self, -1, 'Unpin all')
+        buttons = wx.BoxSizer(wx.HORIZONTAL)
+        buttons.Add(pin_button, 0)
+        buttons.Add(unpin_button, 0)
         self.sizer = wx.BoxSizer(wx.VERTICAL)
         self.sizer.Add(txtpanel, 1, wx.EXPAND)
         self.sizer.Add(self.canvas, 3, wx.EXPAND)
+        self.sizer.Add(buttons, 0)
         self.SetSizerAndFit(self.sizer)
 
         # Return to the original setting.
         rcParams['backend'] = orig_backend
 
+        # Plotted data
+        self._selected = None # Series of the selected variable
+        self._pinned = [] # Series of the pinned variables
+
+        # Time cursor
+        self._background = None
+        self._cursor = None
+        self._cursor_text = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.mpl_connect('motion_notify_event', self._on_motion)
+
+        # Bind events.
+        pin_button.Bind(wx.EVT_BUTTON, self.OnPin)
+        unpin_button.Bind(wx.EVT_BUTTON, self.OnUnpin)
+
+        # Start the background thread.  Only the latest preview request is
+        # kept, but all of the pin requests are.
+        self._condition = Condition()
+        self._request = None # (request_id, name, sim, n_buckets)
+        self._request_id = 0
+        self._pins = [] # [(name, sim, n_buckets), ...]
+        self._stopped = False
+        self.Bind(wx.EVT_WINDOW_DESTROY, self.OnDestroy)
+        worker = Thread(target=self._work)
+        worker.setDaemon(True)
+        worker.start()
+
     def preview(self, name, sim):
         """Show the variable's attributes and a small plot."""
-        self.axes.clear()
         if name:
             text = 'Name: "%s"' % name
             text += '\n' + 'Description: "%s"' % sim.get_description(name)
             text += '\n' + 'unit: "%s"' % sim.get_unit(name)
             text += '\n' + 'displayUnit: "%s"' % sim.get_displayUnit(name)
             self.display.SetLabel(text)
-            self.axes.clear()
-            self.axes.plot(sim.get_times(name), sim.get_values(name))
-            self.axes.set_ylabel(name + " / $%s$" %
-                                 unit2tex(sim.get_unit(name)))
-            self.axes.set_xlabel("Time / s")
         else:
             self.display.SetLabel("")
-        self.canvas.draw()
+        with self._condition:
+            self._request_id += 1
+            self._request = (self._request_id, name, sim, self._n_buckets())
+            self._condition.notify()
+
+    def pin(self, name, sim):
+        """Keep a variable in the plot.
+
+        **Arguments:**
+
+        - *name*: Name of the variable
+
+        - *sim*: Instance of :class:`simres.SimRes` that contains the variable
+
+             This may be different than the simulation in the browser.  The
+             base filename of the simulation is added to the legend entry.
+
+        The data is loaded in the background thread.
+        """
+        with self._condition:
+            self._pins.append((name, sim, self._n_buckets()))
+            self._condition.notify()
+
+    def unpin(self):
+        """Remove all of the pinned variables from the plot."""
+        self._pinned = []
+        self._redraw()
 
     def clear(self):
         """Clear the text and the plot."""
+        with self._condition:
+            self._request_id += 1 # Discard any pending plot.
+            self._pins = []
+        self._selected = None
+        self._pinned = []
         self.axes.clear()
         self.canvas.draw()
 
+    def OnPin(self, event):
+        """Pin the selected variable."""
+        if self._selected is not None and not self._is_pinned(self._selected):
+            self._pinned.append(self._selected)
+            self._redraw()
+
+    def OnUnpin(self, event):
+        """Remove all of the pinned variables."""
+        self.unpin()
+
+    def OnDestroy(self, event):
+        """Stop the background thread when the panel is destroyed."""
+        if event.GetEventObject() is self:
+            with self._condition:
+                self._stopped = True
+                self._condition.notify()
+        event.Skip()
+
+    def _is_pinned(self, series):
+        """Return *True* if a series is pinned."""
+        return any(pinned is series for pinned in self._pinned)
+
+    def _series(self):
+        """Return a list of the pinned and selected series."""
+        series = list(self._pinned)
+        if self._selected is not None and not self._is_pinned(self._selected):
+            series.append(self._selected)
+        return series
+
+    def _n_buckets(self):
+        """Return the number of points (buckets) to which the plotted data is
+        reduced.
+        """
+        return max(self.canvas.GetSize()[0], 100)
+
+    def _work(self):
+        """Load and reduce the data of the latest request (in the background
+        thread).
+        """
+        while True:
+            with self._condition:
+                while (self._request is None and not self._pins
+                       and not self._stopped):
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                if self._pins:
+                    name, sim, n_buckets = self._pins.pop(0)
+                    request_id = None
+                else:
+                    request_id, name, sim, n_buckets = self._request
+                    self._request = None
+            if request_id is None:
+                # Pin request
+                try:
+                    series = _load_series(name, sim, n_buckets,
+                                          "%s (%s)" % (name, sim.fbase))
+                except Exception as error:
+                    wx.CallAfter(self._show_error, None, name, error)
+                else:
+                    wx.CallAfter(self._add_pin, series)
+                continue
+            if not name:
+                wx.CallAfter(self._draw, request_id, None)
+                continue
+            try:
+                series = _load_series(name, sim, n_buckets,
+                                      "%s (%s)" % (name, sim.fbase))
+            except Exception as error:
+                wx.CallAfter(self._show_error, request_id, name, error)
+                continue
+            if request_id == self._request_id:
+                wx.CallAfter(self._draw, request_id, series)
+            # Otherwise, a newer variable has been selected.
+
+    def _draw(self, request_id, series):
+        """Plot the data of a request (in the GUI thread) unless it is stale.
+        """
+        if not self or request_id != self._request_id:
+            return # The panel has been closed or the request is stale.
+        self._selected = series
+        self._redraw()
+
+    def _add_pin(self, series):
+        """Add a pinned series to the plot (in the GUI thread).
+        """
+        if not self:
+            return # The panel has been closed.
+        self._pinned.append(series)
+        self._redraw()
+
+    def _show_error(self, request_id, name, error):
+        """Show an error message in the plot (in the GUI thread) unless the
+        request is stale.
+
+        *request_id* is *None* for a pin request.
+        """
+        if not self:
+            return # The panel has been closed.
+        if request_id is not None:
+            if request_id != self._request_id:
+                return # The request is stale.
+            self._selected = None
+        self._redraw()
+        self.axes.text(0.5, 0.5, 'Could not plot "%s":\n%s' % (name, error),
+                       ha='center', va='center', color='r', size='small',
+                       transform=self.axes.transAxes)
+        self.canvas.draw()
+
+    def _redraw(self):
+        """Plot the pinned and selected variables.
+        """
+        self.axes.clear()
+        series = self._series()
+        for s in series:
+            self.axes.plot(s.plot_times, s.plot_values, label=s.label)
+        if series:
+            last = series[-1]
+            if len(series) == 1:
+                self.axes.set_ylabel(last.label.rsplit(' (', 1)[0]
+                                     + " / $%s$" % last.unit)
+            else:
+                self.axes.legend(loc='best', prop={'size': 'small'})
+            self.axes.set_xlabel("Time / s")
+
+        # Create the (animated) cursor.
+        self._cursor = self.axes.axvline(0, color='k', linewidth=0.5,
+                                         animated=True, visible=False)
+        self._cursor_text = self.axes.text(0.02, 0.98, '', va='top',
+                                           size='small', animated=True,
+                                           transform=self.axes.transAxes)
+        self.canvas.draw()
+
+    def _on_draw(self, event):
+        """Save the background of the plot for the time cursor."""
+        self._background = self.canvas.copy_from_bbox(self.axes.bbox)
+
+    def _on_motion(self, event):
+        """Move the time cursor and show the values of all the variables."""
+        if (event.inaxes is not self.axes or self._background is None
+            or self._cursor is None):
+            return
+        time = event.xdata
+        lines = ["t = %g s" % time]
+        for s in self._series():
+            # Look up the value by binary search and interpolation.
+            if time < s.times[0] or time > s.times[-1]:
+                continue # Out of range
+            if len(s.times) == 1:
+                value = s.values[0]
+            else:
+                i = min(max(s.times.searchsorted(time, side='right'), 1),
+                        len(s.times) - 1)
+                t_0, t_1 = s.times[i - 1], s.times[i]
+                value = s.values[i - 1]
+                if t_1 > t_0:
+                    value += (s.values[i] - value)*(time - t_0)/(t_1 - t_0)
+            lines.append("%s: %g" % (s.label, value))
+        self._cursor.set_xdata([time, time])
+        self._cursor.set_visible(True)
+        self._cursor_text.set_text('\n'.join(lines))
+        self.canvas.restore_region(self._background)
+        self.axes.draw_artist(self._cursor)
+        self.axes.draw_artist(self._cursor_text)
+        self.canvas.blit(self.axes.bbox)
+
 
 class Browser(wx.Frame):
     """Class to browse the variables of a simulation (used in
@@ -84,19 +353,6 @@ class Browser(wx.Frame):
     """
     def __init__(self, parent, id, sim):
 
-        def _build_tree(branches, branch):
-            """Build the variable tree.
-            """
-            for key in branches.keys():
-                data = wx.TreeItemData()
-                if isinstance(branches[key], basestring):
-                    data.SetData(branches[key])
-                    subbranch = self.tree.AppendItem(branch, key, data=data)
-                else:
-                    data.SetData('')
-                    subbranch = self.tree.AppendItem(branch, key, data=data)
-                    _build_tree(branches[key], subbranch) # Recursion
-
         # Initial setup
         wx.Frame.__init__(self, parent, id, pos=wx.DefaultPosition,
                           size=wx.Size(800, 350))
@@ -106,15 +362,29 @@ class Browser(wx.Frame):
         self.panelR = PreviewPanel(self, -1)
         self.sim = sim
 
-        # Add the tree.
+        # Add the search field.
+        searchbox = wx.BoxSizer(wx.HORIZONTAL)
+        self.search = wx.TextCtrl(panelL, -1)
+        self.search.SetToolTipString('Filter the variables (case-insensitive)')
+        self.mode = wx.Choice(panelL, -1, choices=['Substring', 'Glob',
+                                                   'Regex'])
+        self.mode.SetSelection(0)
+        searchbox.Add(self.search, 1, wx.EXPAND)
+        searchbox.Add(self.mode, 0)
+
+        # Add the tree.  Only the top level is added now; the children of a
+        # branch are added when it is first expanded.
         self.tree = wx.TreeCtrl(panelL, 1, wx.DefaultPosition, (-1, -1),
                                 wx.TR_HIDE_ROOT|wx.TR_HAS_BUTTONS)
-        root = sim.nametree()
-        _build_tree(root, self.tree.AddRoot(sim.fbase))
+        self._add_branches(self.tree.AddRoot(sim.fbase), sim.nametree())
 
         # Bind events and finish.
+        self.search.Bind(wx.EVT_TEXT, self.OnSearch)
+        self.mode.Bind(wx.EVT_CHOICE, self.OnSearch)
+        self.tree.Bind(wx.EVT_TREE_ITEM_EXPANDING, self.OnExpanding)
         self.tree.Bind(wx.EVT_TREE_BEGIN_DRAG, self.OnDragInit)
         self.tree.Bind(wx.EVT_TREE_SEL_CHANGED, self.OnSelChanged, id=1)
+        vbox.Add(searchbox, 0, wx.EXPAND)
         vbox.Add(self.tree, 1, wx.EXPAND)
         hbox.Add(panelL, 2, wx.EXPAND)
         hbox.Add(self.panelR, 3, wx.EXPAND)
@@ -122,17 +392,86 @@ class Browser(wx.Frame):
         self.SetSizer(hbox)
         self.Centre()
 
+    def pin(self, name, sim=None):
+        """Keep a variable in the preview plot.
+
+        **Arguments:**
+
+        - *name*: Name of the variable
+
+        - *sim*: Instance of :class:`simres.SimRes` that contains the variable
+
+             If *sim* is *None*, the simulation of the browser is used.  This
+             may be called from another thread (e.g., the interpreter).
+        """
+        wx.CallAfter(self.panelR.pin, name, self.sim if sim is None else sim)
+
+    def _add_branches(self, item, branches):
+        """Add one level of the variable tree below an item.
+
+        The data of a variable is its full name.  The data of a branch is its
+        subtree, which is added by :meth:`OnExpanding`.
+        """
+        for key in sorted(branches.keys()):
+            data = wx.TreeItemData()
+            data.SetData(branches[key])
+            subbranch = self.tree.AppendItem(item, key, data=data)
+            if not isinstance(branches[key], basestring):
+                # Show the expand button before the children are added.
+                self.tree.SetItemHasChildren(subbranch, True)
+
+    def _get_name(self, item):
+        """Return the full variable name of an item or '' if it is a branch.
+        """
+        name = self.tree.GetItemData(item).GetData()
+        return name if isinstance(name, basestring) else ''
+
     def OnDragInit(self, event):
         """Drag the full variable name as text."""
-        text = self.tree.GetItemData(event.GetItem()).GetData() + '\n'
+        text = self._get_name(event.GetItem()) + '\n'
         tdo = wx.TextDataObject(text)
         tds = wx.DropSource(self.tree)
         tds.SetData(tdo)
         tds.DoDragDrop(True)
 
+    def OnExpanding(self, event):
+        """Add the children of a branch the first time it is expanded."""
+        item = event.GetItem()
+        if not self.tree.GetChildrenCount(item, False):
+            branches = self.tree.GetItemData(item).GetData()
+            if not isinstance(branches, basestring):
+                self._add_branches(item, branches)
+
+    def OnSearch(self, event):
+        """List the variables that match the search field (or restore the tree
+        if it is empty)."""
+        query = self.search.GetValue()
+        root = self.tree.GetRootItem()
+        self.tree.Freeze()
+        self.tree.DeleteChildren(root)
+        if query:
+            mode = ['substring', 'glob', 'regex'][self.mode.GetSelection()]
+            try:
+                names = self.sim.search(query, mode, ignore_case=True,
+                                        limit=_MAX_MATCHES + 1)
+            except re.error:
+                names = [] # The regular expression is incomplete.
+            for name in names[:_MAX_MATCHES]:
+                data = wx.TreeItemData()
+                data.SetData(name)
+                self.tree.AppendItem(root, name, data=data)
+            if len(names) > _MAX_MATCHES:
+                data = wx.TreeItemData()
+                data.SetData('')
+                self.tree.AppendItem(root, '(more than %i matches)'
+                                     % _MAX_MATCHES, data=data)
+        else:
+            self._add_branches(root, self.sim.nametree())
+        self.tree.Thaw()
+
     def OnSelChanged(self, event):
         """Update the variable's attributes and plot."""
-        name = self.tree.GetItemData(event.GetItem()).GetData()
+        name = self._get_name(event.GetItem())
         self.panelR.preview(name, self.sim)
 
 # Code below is based on http://code.google.com/p/easywx/, accessed 10/7/2012:
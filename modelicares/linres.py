@@ -22,9 +22,6 @@ import modelicares.base as base
 from scipy.io import loadmat
 from matplotlib.cbook import iterable
 
-from control.matlab import ss
-from control.freqplot import bode, nyquist
-
 
 class LinRes(object):
     """Class for Modelica_-based linearization results and methods to analyze
@@ -119,6 +116,8 @@ class LinRes(object):
         Returns *None* if the file contains simulation results rather than
         linearization results.  Otherwise, it raises an error.
         """
+        from control.matlab import ss
+
         # This performs the task of tloadlin.m from Dymola version 7.4:
         #     on Unix/Linux: /opt/dymola/mfiles/traj/tloadlin.m
         #     on Windows: C:\Program Files\Dymola 7.4\Mfiles\traj\tloadlin.m
@@ -279,6 +278,9 @@ class LinRes(object):
 
               Results of example for :meth:`LinRes.bode`.
         """
+        from control.matlab import ss
+        from control.freqplot import bode
+
         # Create axes if necessary.
         if axes is None or (None, None):
             fig = base.figure(label)
@@ -408,6 +410,9 @@ class LinRes(object):
 
               Results of example for :meth:`LinRes.nyquist`.
         """
+        from control.matlab import ss
+        from control.freqplot import nyquist
+
         # Create axes if necessary.
         if not ax:
             fig = base.figure(label)
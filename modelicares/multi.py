@@ -3,7 +3,10 @@
 """Functions to load and plot data from multiple simulation and linearization
 files at once
 
-This module contains four functions:
+This module contains five functions:
+
+- :meth:`find_files` - Lists the result files at locations that may include
+  directories and wildcards
 
 - :meth:`multiload` - Loads multiple Modelica_ simulation and/or linearization
   results
@@ -32,12 +35,45 @@ from glob import glob
 from matplotlib.cbook import iterable
 from itertools import cycle
 
-from control.freqplot import bode, nyquist
 from linres import LinRes
 from simres import SimRes
 from base import figure, add_hlines, add_vlines
 
 
+def find_files(locations='*'):
+    """List the result files at a location or list of locations.
+
+    **Arguments:**
+
+    - *locations*: Input filename, directory, or list of these
+
+         Wildcards ('*') may be used in the path(s).  For a directory, all of
+         the '.mat' files in it are listed.
+
+    **Example:**
+
+    .. code-block:: python
+
+       >>> from modelicares.multi import find_files
+
+       >>> find_files(['examples', 'examples/ChuaCircuit/*.py']) # doctest: +NORMALIZE_WHITESPACE
+       ['examples/ChuaCircuit.mat', 'examples/PID.mat', 'examples/ThreeTanks.mat',
+        'examples/ChuaCircuit/sim-and-plot.py']
+    """
+    fnames = []
+    if isinstance(locations, basestring):
+        locations = [locations]
+    for location in locations:
+        if os.path.isdir(location):
+            fnames += sorted(glob(os.path.join(location, '*.mat')))
+        else:
+            if '*' in location:
+                fnames += sorted(glob(location))
+            else:
+                fnames.append(location)
+    return fnames
+
+
 def multiload(locations='*'):
     """Load multiple Modelica_ simulation and/or linearization results.
 
@@ -78,17 +114,7 @@ def multiload(locations='*'):
     """
 
     # Make a list of files.
-    fnames = []
-    if isinstance(locations, basestring):
-        locations = [locations]
-    for location in locations:
-        if os.path.isdir(location):
-            fnames += glob(os.path.join(location, '*.mat'))
-        else:
-            if '*' in location:
-                fnames += glob(location)
-            else:
-                fnames.append(location)
+    fnames = find_files(locations)
 
     # Load the files.
     sims = [] # Simulation results
@@ -144,6 +170,9 @@ def multiplot(sims, suffixes='', color=['b', 'g', 'r', 'c', 'm', 'y', 'k'],
     - *\*\*kwargs*: Propagated to :meth:`simres.SimRes.plot` (and thus to
       :meth:`base.plot` and finally :meth:`matplotlib.pyplot.plot`)
 
+         For example, use *decimate='auto'* to plot long trajectories quickly
+         and *collection=True* to overlay many simulations quickly.
+
     **Returns:**
 
     1. *ax1*: Primary y axes
@@ -313,6 +342,8 @@ def multibode(lins, axes=None, pair=(0, 0), label='bode', title="Bode Plot",
 
           Bode plot of PID with varying parameters
     """
+    from control.freqplot import bode
+
     # Create axes if necessary.
     if not axes:
         fig = figure(label)
@@ -458,6 +489,8 @@ def multinyquist(lins, ax=None, pair=(0, 0), label='nyquist',
 
           Nyquist plot of PID with varying parameters
     """
+    from control.freqplot import nyquist
+
     # Create axes if necessary.
     if not ax:
         fig = figure(label)
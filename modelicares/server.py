@@ -0,0 +1,521 @@
+#!/usr/bin/python
+"""Serve simulation results from a long-lived local process
+
+Loading a large result file can take much longer than the analysis that
+follows.  If several scripts or people on the same machine work with the same
+results, a :class:`ResultServer` can keep the loaded results in memory (in the
+process-wide cache, :mod:`modelicares.cache`) and answer queries about them
+over HTTP on the local host.  :class:`RemoteSimRes` is a client with the same
+query methods as :class:`~modelicares.simres.SimRes`, so existing scripts can
+use the server by changing only the class that is instantiated.
+
+Arrays are returned in NumPy_'s binary format (.npy, or .npz for nested lists
+of arrays), so they are neither converted to text nor rounded.  Other values
+are returned as JSON.
+
+The server is usually started from the command line::
+
+   python -m modelicares serve --port 8765 --budget 2048
+
+where the budget is the memory for cached results in MiB.
+
+**Example:**
+
+.. code-block:: python
+
+   >>> from modelicares.server import ResultServer, RemoteSimRes
+
+   >>> server = ResultServer(('localhost', 0)) # Any free port
+   >>> thread = server.start()
+   >>> sim = RemoteSimRes('examples/ChuaCircuit.mat', server.server_address)
+   >>> sim.get_FV('L.v')
+   -0.25352862
+   >>> sim.glob('L.p*')
+   [u'L.p.i', u'L.p.v']
+   >>> sim.close()
+   >>> server.shutdown()
+
+.. _NumPy: http://numpy.scipy.org/
+"""
+__author__ = "Kevin Davies"
+__email__ = "kdavies4@gmail.com"
+__copyright__ = "Copyright 2012-2013, Georgia Tech Research Corporation"
+__license__ = "BSD-compatible (see LICENSE.txt)"
+
+
+import os
+import json
+import httplib
+import numpy as np
+
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from io import BytesIO
+from threading import Thread
+
+from modelicares import cache
+from modelicares.simres import SimRes, _not_found
+
+
+DEFAULT_ADDRESS = ('localhost', 8765)
+"""Default address of the server (host, port)"""
+
+METHODS = ['get_description', 'get_displayUnit', 'get_FV', 'get_IV',
+           'get_times', 'get_unit', 'get_values', 'get_values_at_times',
+           'glob', 'names', 'nametree', 'resample', 'search', '__contains__',
+           '__len__']
+"""Methods of :class:`~modelicares.simres.SimRes` that may be called through
+the server"""
+
+NAME_METHODS = ['get_description', 'get_displayUnit', 'get_FV', 'get_IV',
+                'get_times', 'get_unit', 'get_values', 'get_values_at_times',
+                'resample']
+"""Methods in :const:`METHODS` that take variable name(s) as the first
+argument (*names*)"""
+
+NPY = 'application/x-npy'
+NPZ = 'application/x-npz'
+JSON = 'application/json'
+
+
+def _encode_arg(arg):
+    """Encode an argument of a query so that it can be written as JSON.
+    """
+    if isinstance(arg, slice):
+        return {'slice': [arg.start, arg.stop, arg.step]}
+    if isinstance(arg, np.ndarray):
+        return arg.tolist()
+    return arg
+
+
+def _decode_arg(arg):
+    """Decode an argument that was encoded by :meth:`_encode_arg`.
+    """
+    if isinstance(arg, dict) and arg.keys() == ['slice']:
+        return slice(*arg['slice'])
+    return arg
+
+
+def _is_array(x):
+    """Return *True* if *x* is a NumPy array or scalar.
+    """
+    return isinstance(x, (np.ndarray, np.generic))
+
+
+def _index_arrays(value, arrays):
+    """Return a copy of a (nested) list where the arrays are replaced by
+    references to their indices in *arrays*.
+
+    The arrays are appended to *arrays*.
+    """
+    if _is_array(value):
+        arrays.append(value)
+        return {'__array__': len(arrays) - 1}
+    if isinstance(value, (list, tuple)):
+        return [_index_arrays(entry, arrays) for entry in value]
+    return value
+
+
+def _restore_arrays(structure, arrays):
+    """Return a (nested) list where the references from :meth:`_index_arrays`
+    are replaced by the arrays.
+    """
+    if isinstance(structure, dict) and structure.keys() == ['__array__']:
+        return arrays[structure['__array__']]
+    if isinstance(structure, list):
+        return [_restore_arrays(entry, arrays) for entry in structure]
+    return structure
+
+
+def _to_json(x):
+    """Convert a NumPy array or scalar that couldn't be written to .npz to a
+    value that can be written as JSON.
+    """
+    if _is_array(x):
+        return x.tolist()
+    raise TypeError("%r is not JSON serializable" % x)
+
+
+def _encode(value):
+    """Return the content type and the body of the response for a value.
+
+    A (nested) list that contains arrays is written to .npz along with the
+    structure of the list.
+    """
+    stream = BytesIO()
+    if _is_array(value):
+        np.save(stream, value)
+        return NPY, stream.getvalue()
+    arrays = []
+    structure = _index_arrays(value, arrays)
+    if arrays:
+        np.savez(stream, *arrays, structure=json.dumps(structure))
+        return NPZ, stream.getvalue()
+    return JSON, json.dumps(value, default=_to_json)
+
+
+def _decode(content_type, body):
+    """Return the value of a response encoded by :meth:`_encode`.
+    """
+    def _unwrap(array):
+        return array[()] if array.ndim == 0 else array
+
+    if content_type == NPY:
+        return _unwrap(np.load(BytesIO(body)))
+    if content_type == NPZ:
+        arrays = np.load(BytesIO(body))
+        structure = json.loads(str(arrays['structure']))
+        return _restore_arrays(structure, [_unwrap(arrays['arr_%i' % i])
+                                           for i in range(len(arrays.files)
+                                                          - 1)])
+    return json.loads(body)
+
+
+def _first_invalid(sim, names):
+    """Return the first invalid variable name in a (nested) list of names, or
+    *None* if all of the names are valid.
+    """
+    if isinstance(names, basestring):
+        return None if names in sim else names
+    for name in names:
+        invalid = _first_invalid(sim, name) # Recursion
+        if invalid is not None:
+            return invalid
+    return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Handler for the requests to a :class:`ResultServer`
+    """
+    protocol_version = 'HTTP/1.1' # Keep the connections alive.
+
+    def do_GET(self):
+        """Return the statistics of the cache (at '/stats').
+        """
+        if self.path == '/stats':
+            self._respond(200, cache.results.stats()._asdict())
+        else:
+            self._respond(404, {'error': "Unknown path: %s" % self.path})
+
+    def do_POST(self):
+        """Answer a query.
+
+        The body is a JSON object with the name of the result file (*fname*),
+        the name of the method (*method*), and the positional and keyword
+        arguments (*args* and *kwargs*).
+        """
+        try:
+            length = int(self.headers['Content-Length'])
+            query = json.loads(self.rfile.read(length))
+            method = query['method']
+            assert method in METHODS, ("%s is not an available method."
+                                       % method)
+            args = [_decode_arg(arg) for arg in query.get('args', [])]
+            kwargs = dict((str(key), _decode_arg(arg)) for key, arg
+                          in query.get('kwargs', {}).items())
+        except Exception as error:
+            self._respond(400, {'error': str(error)})
+            return
+        try:
+            sim = SimRes(query['fname'])
+        except Exception as error:
+            self._respond(500, {'error': "Could not load '%s': %s"
+                                % (query['fname'], error)})
+            return
+        try:
+            if method in NAME_METHODS:
+                # Check the names first.  Otherwise, SimRes would print the
+                # suggestions on the server instead of sending them.
+                names = args[0] if args else kwargs.get('names')
+                invalid = _first_invalid(sim, names)
+                if invalid is not None:
+                    self._respond(404, {'error': _not_found(invalid,
+                                                            sim.names())})
+                    return
+            value = getattr(sim, method)(*args, **kwargs)
+        except Exception as error:
+            self._respond(500, {'error': "%s: %s" % (type(error).__name__,
+                                                      error)})
+            return
+        self._respond(200, value)
+
+    def _respond(self, code, value):
+        """Send a response with a value.
+
+        If the value can't be encoded, then an error (500) is sent instead.
+        """
+        try:
+            content_type, body = _encode(value)
+        except Exception as error:
+            content_type, body = _encode({'error':
+                                          "Could not encode the value: %s: %s"
+                                          % (type(error).__name__, error)})
+            code = 500
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Don't log each request."""
+        pass
+
+
+class ResultServer(ThreadingMixIn, HTTPServer):
+    """HTTP server that keeps simulation results in memory and answers
+    queries about them
+
+    Each request is handled in a separate thread.  The results are held in the
+    process-wide cache (:mod:`modelicares.cache`), so a file is loaded again
+    only if it has changed or was evicted.
+
+    **Initialization arguments:**
+
+    - *address*: Tuple of the host and port
+
+         The server is only meant to be reached from the local host.  If the
+         port is 0, then any free port is used (see *server_address*).
+
+    - *budget*: Maximum number of bytes of results held in memory
+
+         If *budget* is *None*, then the budget of the cache is not changed.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=DEFAULT_ADDRESS, budget=None):
+        HTTPServer.__init__(self, address, _Handler)
+        if budget is not None:
+            cache.results.set_budget(budget)
+
+    def start(self):
+        """Serve in a background (daemon) thread and return the thread.
+
+        Use :meth:`shutdown` to stop the server.
+        """
+        thread = Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+
+def serve(address=DEFAULT_ADDRESS, budget=None):
+    """Serve simulation results until interrupted.
+
+    **Arguments:**
+
+    - *address*: Tuple of the host and port
+
+    - *budget*: Maximum number of bytes of results held in memory (*None* for
+      the default of :mod:`modelicares.cache`)
+    """
+    server = ResultServer(address, budget)
+    print("Serving results at http://%s:%i/ (Ctrl+C to stop)"
+          % server.server_address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _remote(method, doc):
+    """Return a method of :class:`RemoteSimRes` that calls *method* on the
+    server.
+    """
+    def call(self, *args, **kwargs):
+        f = kwargs.pop('f', None)
+        value = self._query(method, args, kwargs)
+        if f is None or value is None:
+            return value
+        if isinstance(value, list):
+            return [f(entry) for entry in value]
+        return f(value)
+
+    call.__name__ = method
+    call.__doc__ = doc + """
+
+        See :meth:`modelicares.simres.SimRes.%s`.""" % method
+    return call
+
+
+class RemoteSimRes(object):
+    """Client of a :class:`ResultServer` with the query methods of
+    :class:`~modelicares.simres.SimRes`
+
+    **Initialization arguments:**
+
+    - *fname*: Name of the result file (may include the path)
+
+         The file extension ('.mat') is optional.  The file is loaded by the
+         server, so it must be accessible from the server's file system.
+
+    - *address*: Tuple of the host and port of the server
+
+    The *names* argument of the methods may be a string or a list of strings.
+    The optional *f* argument is applied by the client.  An instance is not
+    meant to be shared among threads.
+
+    **Example:**
+
+    .. code-block:: python
+
+       >>> from modelicares.server import ResultServer, RemoteSimRes
+
+       >>> server = ResultServer(('localhost', 0))
+       >>> thread = server.start()
+       >>> sim = RemoteSimRes('examples/ChuaCircuit.mat', server.server_address)
+       >>> sim['L.v'] # doctest: +ELLIPSIS
+       array([  0.00000000e+00, ... -2.53528625e-01], dtype=float32)
+       >>> sim.get_unit(['L.v', 'L.i'])
+       [u'V', u'A']
+       >>> sim.get_FV([['L.v', 'C1.v'], ['L.i']])
+       [[-0.25352862, 2.4209836], [2.0486615]]
+       >>> sim.get_FV('L.w') # doctest: +NORMALIZE_WHITESPACE
+       L.w is not a valid variable name.
+       <BLANKLINE>
+       Did you mean one of these?
+              L.v
+              L.i
+              L.L
+       >>> values = sim.get_values([['L.v', 'C1.v'], ['L.i']])
+       >>> [[len(v) for v in group] for group in values]
+       [[514, 514], [514]]
+       >>> 'L.v' in sim
+       True
+       >>> sim.close()
+       >>> server.shutdown()
+    """
+
+    def __init__(self, fname='dsres.mat', address=DEFAULT_ADDRESS):
+        fname = os.path.abspath(fname)
+        if not os.path.splitext(fname)[1]:
+            fname += '.mat'
+        self.dir, self.fbase = os.path.split(fname)
+        self.fbase = os.path.splitext(self.fbase)[0]
+        self.fname = fname
+        self.address = tuple(address)
+        self._connection = None
+        try:
+            self._query('__len__') # Check that the server can load the file.
+        except:
+            self.close()
+            raise
+
+    def _query(self, method, args=(), kwargs={}):
+        """Call a method of the result on the server and return the value.
+        """
+        body = json.dumps({'fname': self.fname, 'method': method,
+                           'args': [_encode_arg(arg) for arg in args],
+                           'kwargs': dict((key, _encode_arg(arg))
+                                          for key, arg in kwargs.items())})
+        for attempt in range(2):
+            # Reconnect once if the server closed the connection.
+            if self._connection is None:
+                self._connection = httplib.HTTPConnection(*self.address)
+            try:
+                self._connection.request('POST', '/', body,
+                                         {'Content-Type': JSON})
+                response = self._connection.getresponse()
+                value = _decode(response.getheader('Content-Type'),
+                                response.read())
+                break
+            except (httplib.HTTPException, IOError):
+                self._connection.close()
+                self._connection = None
+                if attempt:
+                    raise
+        if response.status == 404:
+            # Variable not found---like SimRes, print the message.
+            print(value['error'])
+            return None
+        if response.status != 200:
+            raise IOError(value['error'])
+        return value
+
+    get_description = _remote('get_description',
+        "Return the *description* attribute(s) of trajectory variable(s).")
+    get_displayUnit = _remote('get_displayUnit',
+        "Return the *displayUnit* attribute(s) of trajectory variable(s).")
+    get_FV = _remote('get_FV',
+        "Return the final value(s) of trajectory variable(s).")
+    get_IV = _remote('get_IV',
+        "Return the initial value(s) of trajectory variable(s).")
+    get_times = _remote('get_times',
+        "Return vector(s) of the sample times of variable(s).")
+    get_unit = _remote('get_unit',
+        "Return the *unit* attribute(s) of trajectory variable(s).")
+    get_values = _remote('get_values',
+        "Return vector(s) of the values of the samples of variable(s).")
+    get_values_at_times = _remote('get_values_at_times',
+        "Return vector(s) of the values of variable(s) at given times.")
+    glob = _remote('glob',
+        "Return a list of variable names that match *pattern*.")
+    names = _remote('names', "Return a list of all variable names.")
+    keys = variables = names
+    nametree = _remote('nametree',
+        "Return a tree of all variable names with respect to the path names.")
+    resample = _remote('resample',
+        "Return a 2D array of the values of variables (rows) at times "
+        "(columns).")
+    search = _remote('search',
+        "Return the variable names that match a query.")
+
+    def close(self):
+        """Close the connection to the server.
+
+        A new connection is opened if there is another query.
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __contains__(self, name):
+        """Test if a variable is present in the simulation results.
+        """
+        return self._query('__contains__', [name])
+
+    def __getitem__(self, names):
+        """Return the values of variable(s).
+        """
+        return self.get_values(names)
+
+    def __len__(self):
+        """Return the number of variables in the simulation.
+        """
+        return self._query('__len__')
+
+    def __repr__(self):
+        """Return a formal description of the :class:`RemoteSimRes` instance.
+        """
+        return "%s('%s', %s)" % (self.__class__.__name__, self.fname,
+                                 self.address)
+
+    def __str__(self):
+        """Return an informal description of the :class:`RemoteSimRes`
+        instance.
+        """
+        return ('Modelica simulation results from "%s" (served at %s:%i)'
+                % ((self.fname,) + self.address))
+
+
+def server_stats(address=DEFAULT_ADDRESS):
+    """Return the statistics of the server's cache as a dictionary (see
+    :class:`modelicares.cache.CacheStats`).
+    """
+    connection = httplib.HTTPConnection(*address)
+    try:
+        connection.request('GET', '/stats')
+        response = connection.getresponse()
+        return _decode(response.getheader('Content-Type'), response.read())
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    """Test the contents of this file."""
+    import doctest
+    doctest.testmod()
+    exit()
@@ -2,13 +2,28 @@
 # -*- coding: utf-8 -*-
 """Load, analyze, and plot results from Modelica_ simulations.
 
-This module contains two classes:
+This module contains the following classes:
 
 - :class:`SimRes` - Class to load and analyze results from a Modelica_-based
   simulation
 
 - :class:`Info` - Shortcuts to the "get" methods in :class:`SimRes`
 
+- :class:`Comparison` - Named tuple class for the result of :meth:`compare`
+
+- :class:`NameIndex` - Index to search a large list of variable names
+
+- :class:`SharedSimRes` - Handle to simulation results in shared memory
+
+- :class:`TrajEntry` - Named tuple class for a trajectory entry of
+  :class:`SimRes`
+
+and the following functions:
+
+- :meth:`compare` - Compares the common variables of two simulations
+
+- :meth:`merge_times` - Merges a list of multiple time vectors into one vector
+
 .. _Modelica: http://www.modelica.org/
 """
 __author__ = "Kevin Davies"
@@ -19,17 +34,18 @@ __license__ = "BSD-compatible (see LICENSE.txt)"
 
 
 import os
+import sys
 import numpy as np
 import modelicares.base as base
+import modelicares.cache as cache
 
 from scipy.io import loadmat
-from matplotlib.pyplot import figlegend
 from matplotlib import rcParams
 from collections import namedtuple
 from fnmatch import fnmatchcase
 from difflib import get_close_matches
+from bisect import bisect_right
 
-from modelicares.gui import Browser
 from modelicares.texunit import unit2tex, label_number
 
 
@@ -55,6 +71,174 @@ def _small_product(arr):
     return res
 
 
+Comparison = namedtuple('Comparison', ['names', 'max_error', 'time', 'passed'])
+"""Named tuple class for the result of :meth:`compare`
+
+*names* is a list of the variable names.  The other entries are arrays with one
+element per variable: the maximum absolute error (*max_error*), the time at
+which it occurs (*time*), and *True* if the error is within tolerance at all
+times (*passed*).
+"""
+
+# Maximum number of values that are interpolated at once in :meth:`compare`
+_BLOCK_SIZE = 2**22
+
+TrajEntry = namedtuple('TrajEntry', ['data_set', 'sign', 'data_row',
+                                     'description', 'unit', 'displayUnit'])
+"""Named tuple class to represent a Dymosim trajectory entry"""
+
+
+def _interp_rows(times, t, rows):
+    """Linearly interpolate each row of a 2D array at the given times.
+
+    **Arguments:**
+
+    - *times*: Vector of times at which to sample
+
+    - *t*: Monotonically increasing vector of the sample times of *rows*
+
+         Repeated entries (e.g., at events) are allowed.  The value after the
+         last repetition is used.
+
+    - *rows*: 2D array with one trajectory per row (sampled at *t*)
+
+    The values are held constant outside the range of *t*.  The indices and
+    weights are computed once for all of the rows.
+    """
+    if len(t) == 1:
+        return np.repeat(rows[:, 0:1], len(times), axis=1)
+    i = np.clip(np.searchsorted(t, times, side='right'), 1, len(t) - 1)
+    t_0 = t[i - 1]
+    dt = t[i] - t_0
+    w = np.where(dt > 0, (times - t_0)/np.where(dt > 0, dt, 1), 0)
+    w = np.clip(w, 0, 1)
+    y_0 = rows[:, i - 1]
+    return y_0 + (rows[:, i] - y_0)*w
+
+
+def _not_found(name, names):
+    """Return a message that *name* isn't a valid variable name, with the
+    close matches among *names*.
+    """
+    return '\n'.join(["%s is not a valid variable name.\n" % name,
+                      "Did you mean one of these?"]
+                     + ["       " + close_match for close_match
+                        in get_close_matches(name, names)])
+
+
+def compare(sim_a, sim_b, rtol=1e-4, atol=1e-8, names=None):
+    """Compare the common variables of two simulations.
+
+    The trajectories are resampled onto the union of the sample times of both
+    simulations (within the time range that they share).  A variable passes if
+    ``abs(a - b) <= atol + rtol*abs(b)`` at all of those times, where *a* is
+    from *sim_a* and *b* is from *sim_b* (the reference).
+
+    The variables are grouped by data table and processed in blocks so that
+    the comparison is done with array operations rather than one variable at a
+    time.
+
+    **Arguments:**
+
+    - *sim_a*: Simulation result to be checked (instance of :class:`SimRes`)
+
+    - *sim_b*: Reference simulation result (instance of :class:`SimRes`)
+
+    - *rtol*: Relative tolerance
+
+    - *atol*: Absolute tolerance
+
+    - *names*: Name or list of names of the variables to compare
+
+         If *names* is *None* (default), then all of the variables that are
+         present in both simulations are compared.
+
+    **Returns:** Instance of :class:`Comparison`
+
+    A :class:`ValueError` is raised if a variable isn't in both simulations or
+    if the simulations don't share a common time range.
+
+    **Example:**
+
+    .. code-block:: python
+
+       >>> from modelicares.simres import SimRes, compare
+
+       >>> sim = SimRes('examples/ChuaCircuit.mat')
+       >>> result = compare(sim, sim, names=['L.v', 'C1.v'])
+       >>> result.names
+       ['L.v', 'C1.v']
+       >>> all(result.passed)
+       True
+       >>> max(result.max_error)
+       0.0
+
+       >>> compare(sim, sim, names=['L.vv']) # doctest: +ELLIPSIS
+       Traceback (most recent call last):
+         ...
+       ValueError: L.vv is not a valid variable name.
+       <BLANKLINE>
+       Did you mean one of these?
+              L.v
+              L.p.v
+              L.n.v
+    """
+    # Process the inputs.
+    if names is None:
+        names = sorted(set(sim_a._traj.keys()) & set(sim_b._traj.keys()))
+    else:
+        names = base.flatten_list(names)
+    n_names = len(names)
+    max_error = np.zeros(n_names)
+    time = np.zeros(n_names)
+    passed = np.ones(n_names, dtype=bool)
+
+    # Group the variables by the pair of data tables that contain them.
+    groups = {}
+    for i, name in enumerate(names):
+        for sim in [sim_a, sim_b]:
+            if name not in sim._traj:
+                raise ValueError(_not_found(name, sim._traj.keys()))
+        key = (sim_a._traj[name].data_set, sim_b._traj[name].data_set)
+        groups.setdefault(key, []).append(i)
+
+    for (set_a, set_b), indices in groups.items():
+        data_a = sim_a._data[set_a]
+        data_b = sim_b._data[set_b]
+        t_a = data_a[0]
+        t_b = data_b[0]
+
+        # Merge the time vectors over the shared range.
+        times = merge_times([t_a, t_b])
+        times = times[(times >= max(t_a[0], t_b[0]))
+                      & (times <= min(t_a[-1], t_b[-1]))]
+        if not len(times):
+            raise ValueError("The simulations do not share a common time "
+                             "range.")
+
+        # Compare the variables block by block.
+        block = max(1, _BLOCK_SIZE//len(times))
+        for start in range(0, len(indices), block):
+            ind = indices[start:start + block]
+            entries_a = [sim_a._traj[names[i]] for i in ind]
+            entries_b = [sim_b._traj[names[i]] for i in ind]
+            y_a = _interp_rows(times, t_a,
+                               data_a[[e.data_row for e in entries_a]]
+                               .astype(float))
+            y_a *= np.array([e.sign for e in entries_a])[:, np.newaxis]
+            y_b = _interp_rows(times, t_b,
+                               data_b[[e.data_row for e in entries_b]]
+                               .astype(float))
+            y_b *= np.array([e.sign for e in entries_b])[:, np.newaxis]
+            error = np.abs(y_a - y_b)
+            i_max = error.argmax(axis=1)
+            max_error[ind] = error[np.arange(len(ind)), i_max]
+            time[ind] = times[i_max]
+            passed[ind] = np.all(error <= atol + rtol*np.abs(y_b), axis=1)
+
+    return Comparison(names, max_error, time, passed)
+
+
 def merge_times(times_list):
     """Merge a list of multiple time vectors into one vector.
 
@@ -77,6 +261,130 @@ def merge_times(times_list):
     all_times.sort()
     return all_times
 
+
+class NameIndex(object):
+    """Index to search a large list of variable names
+
+    The names are sorted and joined into a single newline-separated string so
+    that a search is done by the string and regular expression scanners (in C)
+    rather than a loop over the names in Python.  A match is mapped back to its
+    name by a binary search over the start positions of the names.
+
+    **Initialization arguments:**
+
+    - *names*: List of variable names
+
+    **Example:**
+
+    .. code-block:: python
+
+       >>> from modelicares.simres import NameIndex
+
+       >>> index = NameIndex(['L.p.i', 'L.p.v', 'L.n.v', 'C1.v'])
+       >>> index.search('p.')
+       ['L.p.i', 'L.p.v']
+       >>> index.search('*.v', mode='glob')
+       ['C1.v', 'L.n.v', 'L.p.v']
+       >>> index.search('^L\.[np]\.v$', mode='regex')
+       ['L.n.v', 'L.p.v']
+       >>> index.search('c1', ignore_case=True)
+       ['C1.v']
+    """
+
+    def __init__(self, names):
+        self.names = sorted(names)
+        self._text = '\n'.join(self.names)
+        self._lower = None # Built upon the first case-insensitive search
+        self._starts = []
+        start = 0
+        for name in self.names:
+            self._starts.append(start)
+            start += len(name) + 1
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, query, mode='substring', ignore_case=False, limit=None):
+        """Return a sorted list of the names that match a query.
+
+        **Arguments:**
+
+        - *query*: Substring, Unix shell-style pattern, or regular expression
+
+        - *mode*: 'substring', 'glob' (see :meth:`SimRes.glob`), or 'regex'
+
+             In 'glob' mode, the pattern must match the entire name.  In
+             'regex' mode, it may match any part of the name (use '^' and '$'
+             to anchor it).
+
+        - *ignore_case*: *True*, if the search should be case-insensitive
+
+        - *limit*: Maximum number of names to return (*None* for no limit)
+        """
+        assert mode in ['substring', 'glob', 'regex'], (
+            'The mode must be "substring", "glob", or "regex".')
+        import re
+
+        if not self.names:
+            return []
+        if ignore_case:
+            if self._lower is None:
+                self._lower = self._text.lower()
+            text = self._lower
+        else:
+            text = self._text
+
+        if mode == 'substring':
+            if ignore_case:
+                query = query.lower()
+            return self._scan(lambda pos: text.find(query, pos), None, limit)
+
+        if mode == 'glob':
+            if ignore_case:
+                query = query.lower()
+            # Find candidates by the longest literal part of the pattern, then
+            # check them against the full pattern.
+            literal = max(re.split(r'[*?]|\[[^\]]*\]?', query), key=len)
+            if ignore_case:
+                verify = lambda name: fnmatchcase(name.lower(), query)
+            else:
+                verify = lambda name: fnmatchcase(name, query)
+            return self._scan(lambda pos: text.find(literal, pos), verify,
+                              limit)
+
+        # Regular expression
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        regex = re.compile(query, flags)
+
+        def _find(pos):
+            """Return the position of the next candidate or -1."""
+            match = regex.search(self._text, pos)
+            return -1 if match is None else match.start()
+
+        # A match may span several names, so check each one.
+        return self._scan(_find, regex.search, limit)
+
+    def _scan(self, find, verify, limit):
+        """Collect the names at the positions returned by *find*.
+
+        *find(pos)* returns the position of the next candidate at or after
+        *pos* or -1.  If *verify* is not *None*, it is called on each candidate
+        name to confirm the match.
+        """
+        results = []
+        pos = 0
+        while limit is None or len(results) < limit:
+            pos = find(pos)
+            if pos < 0:
+                break
+            i = bisect_right(self._starts, pos) - 1
+            name = self.names[i]
+            if verify is None or verify(name):
+                results.append(name)
+            pos = self._starts[i] + len(name) + 1 # Skip to the next name.
+        return results
+
+
 class SimRes(object):
     """Class to load and analyze results from a Modelica_-based simulation
 
@@ -116,13 +424,24 @@ class SimRes(object):
 
     - :meth:`glob` - Returns a list of variable names that match a pattern
 
+    - :meth:`search` - Returns a list of variable names that match a
+      substring, pattern, or regular expression (using an index)
+
     - :meth:`nametree` - Returns a tree of all variable names with respect to
       the path names
 
     - :meth:`plot` - Plots data as points and/or curves in 2D Cartesian
       coordinates
 
+    - :meth:`resample` - Returns the values of variables at times as a 2D
+      array
+
     - :meth:`sankey` - Creates a figure with Sankey diagram(s)
+
+    - :meth:`sankey_animation` - Creates a movie of a Sankey diagram over time
+
+    - :meth:`share` - Publishes the results to shared memory for other
+      processes
     """
 
     def __init__(self, fname='dsres.mat', constants_only=False):
@@ -143,12 +462,27 @@ class SimRes(object):
              information is needed, it will save some time and memory to set
              *constants_only* to *True*.
 
+        The loaded data is kept in a process-wide cache (see
+        :mod:`modelicares.cache`).  If the same file is loaded again and it
+        has not changed, then the data is shared rather than reloaded.
+        Therefore, the arrays returned by the *get_*\* methods should not be
+        modified in place.
+
         **Example:**
 
            >>> from modelicares import SimRes
            >>> sim = SimRes('examples/ChuaCircuit.mat')
         """
-        self._load(fname, constants_only)
+        key = cache.results.key(fname, constants_only)
+        cached = cache.results.get(key)
+        if cached is None:
+            self._load(fname, constants_only)
+            cache.results.put(key, (self._traj, self._data),
+                              sum(data.nbytes for data in self._data))
+        else:
+            self._traj, self._data = cached
+        self._nametree = None # Built upon the first call to nametree()
+        self._nameindex = None # Built upon the first call to search()
 
         # Save the base filename and the directory.
         self.dir, self.fbase = os.path.split(fname)
@@ -268,6 +602,7 @@ class SimRes(object):
             if len(ax) == 1:
                 ax[0].legend(loc=loc, **leg_kwargs)
             else:
+                from matplotlib.pyplot import figlegend
                 figlegend(ax[0].lines, **leg_kwargs)
         return ax
 
@@ -300,12 +635,6 @@ class SimRes(object):
         #     on Unix/Linux: /opt/dymola/mfiles/traj/tload.m
         #     on Windows: C:\Program Files\Dymola 7.4\Mfiles\traj\tload.m
 
-        TrajEntry = namedtuple('TrajEntry', ['data_set', 'sign', 'data_row',
-                                             'description', 'unit',
-                                             'displayUnit'])
-        """Named tuple class to represent a Dymosim trajectory entry"""
-
-
         def _parse_description(description):
             """Parse the variable description string into (description, unit,
             displayUnit).
@@ -412,20 +741,42 @@ class SimRes(object):
                   fname)
             raise
 
-    def browse(self):
+    def browse(self, block=True):
         """Launch a variable browser.
 
         When a variable is selected, the right panel shows its attributes and
         a simple plot of the variable over time.  Variable names can be dragged
         and dropped into a text editor.
 
-        There are no arguments or return values.
+        **Arguments:**
+
+        - *block*: *True* (default), if the function should not return until
+          the browser is closed
+
+             If *block* is *False* and a wxPython main loop is already running
+             (e.g., in IPython with ``%gui wx``), then the browser is added to
+             it.  Otherwise, the browser runs in a background (daemon) thread,
+             so it is closed when the script or interpreter exits.  Some
+             platforms (e.g., Mac OS X, and to some extent GTK) only support a
+             GUI in the main thread; use the default there.
+
+        **Returns:** The :class:`gui.Browser` frame if *block* is *False* (or
+        *None* otherwise)
+
+        Variables (also from other simulations) can be pinned to the plot using
+        :meth:`gui.Browser.pin`.
 
         **Example:**
 
            >>> from modelicares import SimRes
            >>> sim = SimRes('examples/ChuaCircuit.mat')
-           >>> sim.browse()
+           >>> sim.browse() # doctest: +SKIP
+
+        From an interactive session, the browser can be run in the background
+        and variables can be pinned to its plot:
+
+           >>> browser = sim.browse(block=False) # doctest: +SKIP
+           >>> browser.pin('L.v') # doctest: +SKIP
 
         .. only:: html
 
@@ -440,24 +791,57 @@ class SimRes(object):
               :alt: variable browser
         """
         import wx
+        from threading import Event, Thread
+        from modelicares.gui import Browser
 
-        def _do_work():
-            """Launch the broswer."""
+        def _launch():
+            """Create the browser and return the application and the frame."""
             app = wx.GetApp()
             if app is None:
                 app = wx.App()
             frame = Browser(None, -1, self)
             frame.Show(True)
             app.SetTopWindow(frame)
+            return app, frame
+
+        if block:
+            app, frame = _launch()
             app.MainLoop()
+            return
 
-        # TODO: Fix multithreading so that it can run in the background?
-        #import threading
-        #thread = threading.Thread(target=_do_work)
-        #thread.setDaemon(True)
-        #thread.start()
+        app = wx.GetApp()
+        if app is not None and app.IsMainLoopRunning():
+            # Use the existing event loop.
+            frame = Browser(None, -1, self)
+            frame.Show(True)
+            return frame
 
-        _do_work()
+        # Launch the browser in a background thread.  Errors are passed back
+        # to this thread.
+        frames = []
+        errors = []
+        created = Event()
+
+        def _do_work():
+            """Launch the browser and run its main loop."""
+            try:
+                app, frame = _launch()
+                frames.append(frame)
+            except Exception:
+                errors.append(sys.exc_info())
+                return
+            finally:
+                created.set()
+            app.MainLoop()
+
+        thread = Thread(target=_do_work)
+        thread.setDaemon(True)
+        thread.start()
+        created.wait()
+        if errors:
+            exc_type, exc_value, traceback = errors[0]
+            raise exc_type, exc_value, traceback
+        return frames[0]
 
     def _get(self, names, attr):
         """Return attribute(s) of trajectory variable(s).
@@ -496,10 +880,7 @@ class SimRes(object):
                         attrs.append(a)
                 return attrs
         except KeyError:
-            print('%s is not a valid variable name.\n' % names)
-            print("Did you mean one of these?")
-            for close_match in get_close_matches(names, self._traj.keys()):
-                print("       " + close_match)
+            print(_not_found(names, self._traj.keys()))
             return
 
     def get_description(self, names):
@@ -902,6 +1283,9 @@ class SimRes(object):
 
         There are no arguments.
 
+        The tree is built upon the first call and then reused, so it should
+        not be modified.
+
         **Example:**
 
            >>> from modelicares import SimRes
@@ -913,6 +1297,8 @@ class SimRes(object):
         # (Joerg Raedler,
         # http://www.j-raedler.de/2011/09/dymat-reading-modelica-results-with-python/,
         # BSD License).
+        if self._nametree is not None:
+            return self._nametree
         root = {}
         for name in self._traj.keys():
             branch = root
@@ -922,8 +1308,40 @@ class SimRes(object):
                     branch[element] = {}
                 branch = branch[element]
             branch[elements[-1]] = name
+        self._nametree = root
         return root
 
+    def search(self, query, mode='substring', ignore_case=False, limit=None):
+        """Return a sorted list of variable names that match a query.
+
+        An index of the names (:class:`NameIndex`) is built upon the first
+        call and reused, so repeated searches (e.g., while typing) are fast
+        even for results with hundreds of thousands of variables.
+
+        **Arguments:**
+
+        - *query*: Substring, Unix shell-style pattern (see :meth:`glob`), or
+          regular expression
+
+        - *mode*: 'substring', 'glob', or 'regex'
+
+        - *ignore_case*: *True*, if the search should be case-insensitive
+
+        - *limit*: Maximum number of names to return (*None* for no limit)
+
+        **Example:**
+
+           >>> from modelicares import SimRes
+           >>> sim = SimRes('examples/ChuaCircuit.mat')
+           >>> sim.search('L.p')
+           [u'L.p.i', u'L.p.v']
+           >>> sim.search('^C[12]\.v$', mode='regex')
+           [u'C1.v', u'C2.v']
+        """
+        if self._nameindex is None:
+            self._nameindex = NameIndex(self._traj.keys())
+        return self._nameindex.search(query, mode, ignore_case, limit)
+
     def plot(self, ynames1=[], ylabel1=None, legends1=[],
              leg1_kwargs={'loc': 'best'}, ax1=None,
              ynames2=[], ylabel2=None, legends2=[],
@@ -993,6 +1411,10 @@ class SimRes(object):
              argument is ignored.  The curves on the primary axis will be solid
              and the curves on the secondary axis will be dotted.
 
+             Use *decimate='auto'* to plot long trajectories quickly and
+             *collection=True* to plot many curves quickly (see
+             :meth:`base.plot`).
+
         **Returns:**
 
         1. *ax1*: Primary y axes
@@ -1280,6 +1702,215 @@ class SimRes(object):
                            unit=flow_unit, **kwargs).finish())
         return sankeys
 
+    def resample(self, names, times):
+        """Return a 2D array of the values of variables (rows) at times
+        (columns).
+
+        The variables are interpolated linearly with array operations, one
+        data table at a time, so this is much faster than
+        :meth:`get_values_at_times` for many variables.  The values are held
+        constant outside the time range of the simulation.
+
+        **Arguments:**
+
+        - *names*: List of variable names
+
+        - *times*: Vector of times
+
+        **Example:**
+
+           >>> from modelicares import SimRes
+           >>> sim = SimRes('examples/ChuaCircuit.mat')
+           >>> sim.resample(['L.v', 'Time'], [0, 2000])
+           array([[  0.00000000e+00,   1.54593408e-01],
+                  [  0.00000000e+00,   2.00000000e+03]])
+        """
+        times = np.asarray(times, dtype=float)
+        values = np.empty((len(names), len(times)))
+        groups = {}
+        for i, name in enumerate(names):
+            groups.setdefault(self._traj[name].data_set, []).append(i)
+        for data_set, indices in groups.items():
+            if data_set == -1:
+                # Time itself
+                values[indices] = times
+                continue
+            data = self._data[data_set]
+            entries = [self._traj[names[i]] for i in indices]
+            values[indices] = _interp_rows(times, data[0],
+                                           data[[e.data_row for e in entries]]
+                                           .astype(float))
+            values[indices] *= np.array([e.sign for e in entries])[:,
+                                                                  np.newaxis]
+        return values
+
+    def sankey_animation(self, names, times, fname="sankey", fps=10,
+                         title=None, label="sankey", encoder='ffmpeg',
+                         **kwargs):
+        """Create a movie of a Sankey diagram over time.
+
+        The flows are resampled at all of the times at once.  A single figure
+        and diagram are created, and the geometry and labels of the diagram are
+        updated for each frame.  The frames are streamed to a video encoder
+        using :meth:`base.animate_figure`, so no image files are written.
+
+        **Arguments:**
+
+        - *names*: List of names of the flow variables
+
+        - *times*: List of times at which the data should be sampled (one
+          frame per time)
+
+        - *fname*: Filename for the movie (see :meth:`base.animate_figure`)
+
+        - *fps*: Number of frames per second
+
+        - *title*: Title for the figure
+
+             If *title* is *None* (default), then the title will be "Sankey
+             Diagram of *fbase*", where *fbase* is the base filename of the
+             data.  Use '' for no title.
+
+        - *label*: Label for the figure
+
+        - *encoder*: 'ffmpeg' or 'mencoder'
+
+        - *\*\*kwargs*: Additional arguments for
+          :class:`matplotlib.sankey.Sankey`
+
+             The *scale* should be chosen so that the largest flows fit within
+             the axes.  The axis limits are fixed at the frame with the
+             largest total flow.
+
+        **Example:**
+
+        .. code-block:: python
+
+           from numpy import linspace
+           from modelicares import SimRes
+
+           sim = SimRes('examples/ThreeTanks')
+           sim.sankey_animation(fname='examples/ThreeTanks', format='%.1f ',
+               names=['tank1.ports[1].m_flow', 'tank2.ports[1].m_flow',
+                      'tank3.ports[1].m_flow'],
+               times=linspace(0, 200, 201),
+               labels=['Tank 1', 'Tank 2', 'Tank 3'],
+               orientations=[-1, 0, 1],
+               scale=0.1, margin=6, offset=1.5,
+               pathlengths=2, trunklength=10)
+        """
+        # Note:  The output of the code above is too large for inline doctest.
+        from matplotlib.sankey import Sankey
+
+        # Get the data.
+        flows = self.resample(names, times)
+        start_time, stop_time = self.get_times('Time', [0, -1])
+
+        # Create a title if necessary.
+        if title is None:
+            title = "Sankey Diagram of " + self.fbase
+
+        # Determine the units of the data.
+        flow_unit = self.get_unit(names)
+        assert len(set(flow_unit)) == 1, (
+            "The variables have inconsistent units.")
+        flow_unit = flow_unit[0]
+        time_unit = unit2tex(self.get_unit('Time'))
+
+        # Create the diagram at the frame with the largest total flow so that
+        # the axis limits fit all of the frames.
+        fig = base.figure(label)
+        ax = fig.add_subplot(111)
+        ax.get_xaxis().set_visible(False)
+        ax.get_yaxis().set_visible(False)
+        ax.set_title(title)
+        i_max = np.abs(flows).sum(axis=0).argmax()
+        diagram = Sankey(ax, flows=flows[:, i_max], unit=flow_unit,
+                         **kwargs).finish()[0]
+        limits = ax.axis()
+        time_text = ax.text(0.02, 0.02, '', transform=ax.transAxes)
+
+        def update(fig, i):
+            """Update the diagram to frame *i*.
+            """
+            # Lay out the diagram and copy the geometry and labels.
+            new = Sankey(ax, flows=flows[:, i], unit=flow_unit,
+                         **kwargs).diagrams[0]
+            diagram.patch._path = new.patch.get_path() # No set_path() method
+            diagram.patch.stale = True
+            for text, new_text in zip(diagram.texts + [diagram.text],
+                                      new.texts + [new.text]):
+                text.set_text(new_text.get_text())
+                text.set_position(new_text.get_position())
+                new_text.remove()
+            new.patch.remove()
+            ax.axis(limits)
+
+            # Label the time.
+            time = times[i]
+            time_text.set_text("t = %s %s%s" % (
+                time, time_unit, " (initial)" if time == start_time
+                else " (final)" if time == stop_time else ""))
+
+        base.animate_figure(fig, update, range(len(times)), fname=fname,
+                            fps=fps, encoder=encoder)
+
+    def share(self, directory=None):
+        """Publish the results to shared memory and return a handle
+        (:class:`SharedSimRes`) that other processes can attach to.
+
+        The data tables are written as NumPy_ (.npy) files to a new directory
+        in shared memory (/dev/shm, if available).  The handle is small, so it
+        can be passed to the workers of a :class:`multiprocessing.Pool`
+        instead of the results themselves.  Each worker maps the files into
+        memory rather than loading or unpickling a copy of the data, so the
+        memory is shared by all of the workers.
+
+        **Arguments:**
+
+        - *directory*: Directory in which to create the shared directory
+
+             If *directory* is *None*, then /dev/shm is used if it exists;
+             otherwise the default temporary directory is used.
+
+        Call :meth:`SharedSimRes.unlink` to release the memory once the
+        workers are done (or use the handle in a *with* statement).
+
+        **Example:**
+
+        .. code-block:: python
+
+           >>> from modelicares import SimRes
+           >>> sim = SimRes('examples/ChuaCircuit.mat')
+           >>> with sim.share() as shared:
+           ...     shared.attach().get_FV('L.v')
+           -0.25352862
+
+        In a pool of workers:
+
+        .. code-block:: python
+
+           def final_voltage(shared):
+               return shared.attach().get_FV('L.v')
+
+           with sim.share() as shared:
+               print(Pool(4).map(final_voltage, [shared]*4))
+
+        .. _NumPy: http://numpy.scipy.org/
+        """
+        import cPickle as pickle
+        from tempfile import mkdtemp
+
+        if directory is None and os.path.isdir('/dev/shm'):
+            directory = '/dev/shm'
+        path = mkdtemp(prefix='modelicares-%s-' % self.fbase, dir=directory)
+        for i, data in enumerate(self._data):
+            np.save(os.path.join(path, 'data_%i.npy' % (i+1)), data)
+        with open(os.path.join(path, 'traj.pkl'), 'wb') as f:
+            pickle.dump(self._traj, f, pickle.HIGHEST_PROTOCOL)
+        return SharedSimRes(path, os.path.join(self.dir, self.fbase + '.mat'),
+                            len(self._data))
+
     def __call__(self, names, action=get_values, *args, **kwargs):
         """Upon a call to an instance of :class:`SimRes`, call a method on
         variable(s) given their name(s)
@@ -1423,6 +2054,69 @@ class SimRes(object):
                 os.path.join(self.dir, self.fbase + '.mat'))
 
 
+class SharedSimRes(object):
+    """Handle to simulation results in shared memory (from
+    :meth:`SimRes.share`)
+
+    The handle only holds the location of the shared files, so it is cheap to
+    pickle and send to other processes.
+
+    **Initialization arguments:**
+
+    - *path*: Directory of the shared files
+
+    - *fname*: Name of the original result file
+
+    - *n_data_sets*: Number of data tables
+    """
+
+    def __init__(self, path, fname, n_data_sets):
+        self.path = path
+        self.fname = fname
+        self.n_data_sets = n_data_sets
+
+    def attach(self):
+        """Return an instance of :class:`SimRes` that uses the shared data.
+
+        The data tables are memory-mapped (read-only), so nothing is copied.
+        """
+        import cPickle as pickle
+
+        sim = SimRes.__new__(SimRes)
+        with open(os.path.join(self.path, 'traj.pkl'), 'rb') as f:
+            sim._traj = pickle.load(f)
+        sim._data = [np.load(os.path.join(self.path, 'data_%i.npy' % (i+1)),
+                             mmap_mode='r')
+                     for i in range(self.n_data_sets)]
+        sim._nametree = None
+        sim._nameindex = None
+        sim.dir, sim.fbase = os.path.split(self.fname)
+        sim.fbase = os.path.splitext(sim.fbase)[0]
+        return sim
+
+    def unlink(self):
+        """Remove the shared files.
+
+        Instances that are already attached keep their data until they are
+        deleted, but new instances cannot be attached.
+        """
+        from shutil import rmtree
+        rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.unlink()
+
+    def __repr__(self):
+        """Return a formal description of the :class:`SharedSimRes`
+        instance.
+        """
+        return "%s(%r, %r, %i)" % (self.__class__.__name__, self.path,
+                                   self.fname, self.n_data_sets)
+
+
 class Info:
     """Shortcuts to the "get" methods in :class:`SimRes`
     """